@@ -9,10 +9,10 @@
 import { useState, useEffect } from "react"
 import { useAuth } from "@/contexts/AuthContext"
 import { getAllStations } from "@/services/stationsService"
-import { getSensorReadings, getDailyAggregates } from "@/services/sensorService"
+import { getDailyAggregates, getStationComparison } from "@/services/sensorService"
 import { getPermittedStations } from "@/utils/permissions"
-import { exportSensorDataToCSV, exportDailyDataToCSV } from "@/services/exportService"
-import type { Station, SensorReading, DailyAggregate, TimeRange } from "@/types"
+import { downloadSensorDataExport, exportDailyDataToCSV } from "@/services/exportService"
+import type { Station, StationComparison, TimeRange } from "@/types"
 import { StationSelector } from "@/components/dashboard/StationSelector"
 import { TimeRangeSelector } from "@/components/TimeRangeSelector"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
@@ -23,6 +23,8 @@ import { Skeleton } from "@/components/ui/skeleton"
 import { Download, MapPin } from "lucide-react"
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from "recharts"
 
+const COMPARE_SENSORS = ["air_temperature", "relative_humidity", "vpd", "soil_moisture1"]
+
 export default function ComparePage() {
   const { user } = useAuth()
   const [allStations, setAllStations] = useState<Station[]>([])
@@ -32,10 +34,7 @@ export default function ComparePage() {
   const [station1, setStation1] = useState<Station | null>(null)
   const [station2, setStation2] = useState<Station | null>(null)
   const [timeRange, setTimeRange] = useState<TimeRange>(7)
-  const [readings1, setReadings1] = useState<SensorReading[]>([])
-  const [readings2, setReadings2] = useState<SensorReading[]>([])
-  const [dailyData1, setDailyData1] = useState<DailyAggregate[]>([])
-  const [dailyData2, setDailyData2] = useState<DailyAggregate[]>([])
+  const [comparison, setComparison] = useState<StationComparison | null>(null)
   const [isLoading, setIsLoading] = useState(true)
   const [isLoadingData, setIsLoadingData] = useState(false)
 
@@ -73,26 +72,17 @@ export default function ComparePage() {
 
   // Load comparison data when stations or time range changes
   useEffect(() => {
-    if (!station1Id || !station2Id || station1Id === station2Id) return
+    if (!station1Id || !station2Id || station1Id === station2Id) {
+      setComparison(null)
+      return
+    }
 
     const loadData = async () => {
       setIsLoadingData(true)
 
-      // Load time-series data
-      const [data1, data2] = await Promise.all([
-        getSensorReadings(station1Id, timeRange),
-        getSensorReadings(station2Id, timeRange),
-      ])
-      setReadings1(data1)
-      setReadings2(data2)
-
-      // Load daily aggregates
-      const [daily1, daily2] = await Promise.all([
-        getDailyAggregates(station1Id, timeRange),
-        getDailyAggregates(station2Id, timeRange),
-      ])
-      setDailyData1(daily1)
-      setDailyData2(daily2)
+      // Both stations, hourly buckets on a shared time axis, in one request
+      const data = await getStationComparison([station1Id, station2Id], timeRange, COMPARE_SENSORS)
+      setComparison(data)
 
       setIsLoadingData(false)
     }
@@ -100,21 +90,20 @@ export default function ComparePage() {
     loadData()
   }, [station1Id, station2Id, timeRange])
 
-  // Handle CSV exports
+  // Handle CSV exports; the time series file is streamed from both stations' raw readings
   const handleExportTimeSeries = () => {
     if (!station1 || !station2) return
 
-    // Export both stations' data
-    const sensors1 =
-      station1.type === "weather" ? ["airTemperature", "relativeHumidity", "vpd"] : ["soilMoisture1", "soilMoisture2"]
-    const sensors2 =
-      station2.type === "weather" ? ["airTemperature", "relativeHumidity", "vpd"] : ["soilMoisture1", "soilMoisture2"]
+    const sensorsFor = (station: Station) =>
+      station.type === "weather" ? ["airTemperature", "relativeHumidity", "vpd"] : ["soilMoisture1", "soilMoisture2"]
+    const sensors = Array.from(new Set([...sensorsFor(station1), ...sensorsFor(station2)]))
 
-    exportSensorDataToCSV(`${station1.name}_vs_${station2.name}`, readings1, sensors1, timeRange)
+    downloadSensorDataExport([station1.id, station2.id], sensors, timeRange)
   }
 
-  const handleExportDaily = () => {
+  const handleExportDaily = async () => {
     if (!station1 || !station2) return
+    const dailyData1 = await getDailyAggregates(station1.id, timeRange)
     exportDailyDataToCSV(`${station1.name}_vs_${station2.name}`, dailyData1, timeRange)
   }
 
@@ -131,29 +120,27 @@ export default function ComparePage() {
   const bothWeather = station1?.type === "weather" && station2?.type === "weather"
   const bothSoil = station1?.type === "soil" && station2?.type === "soil"
 
-  // Merge data for comparison charts
-  const mergedData = readings1
-    .map((r1, idx) => {
-      const r2 = readings2[idx]
-      if (!r2) return null
-
-      return {
-        time: new Date(r1.timestamp).toLocaleString("th-TH", {
-          month: "short",
-          day: "numeric",
-          hour: "2-digit",
-        }),
-        station1_temp: r1.airTemperature,
-        station2_temp: r2.airTemperature,
-        station1_humidity: r1.relativeHumidity,
-        station2_humidity: r2.relativeHumidity,
-        station1_vpd: r1.vpd,
-        station2_vpd: r2.vpd,
-        station1_soil1: r1.soilMoisture1,
-        station2_soil1: r2.soilMoisture1,
-      }
-    })
-    .filter(Boolean)
+  // Chart rows from the server-aligned matrix; empty buckets stay as gaps. Rows are looked up by
+  // station id because the server drops repeated ids and may answer for a previous selection.
+  const value = (sensor: string, stationId: string | null, bucketIndex: number) => {
+    const stationIndex = stationId ? (comparison?.stations.indexOf(stationId) ?? -1) : -1
+    return stationIndex < 0 ? undefined : (comparison?.fields[sensor]?.[stationIndex]?.[bucketIndex] ?? undefined)
+  }
+  const mergedData = (comparison?.buckets ?? []).map((bucket, idx) => ({
+    time: bucket.toLocaleString("th-TH", {
+      month: "short",
+      day: "numeric",
+      hour: "2-digit",
+    }),
+    station1_temp: value("air_temperature", station1Id, idx),
+    station2_temp: value("air_temperature", station2Id, idx),
+    station1_humidity: value("relative_humidity", station1Id, idx),
+    station2_humidity: value("relative_humidity", station2Id, idx),
+    station1_vpd: value("vpd", station1Id, idx),
+    station2_vpd: value("vpd", station2Id, idx),
+    station1_soil1: value("soil_moisture1", station1Id, idx),
+    station2_soil1: value("soil_moisture1", station2Id, idx),
+  }))
 
   return (
     <div className="space-y-6">
@@ -8,9 +8,8 @@
 
 import { useState, useEffect } from "react"
 import { useAuth } from "@/contexts/AuthContext"
-import { getAllStations } from "@/services/stationsService"
-import { getLatestSensorReading, getWeatherForecast } from "@/services/sensorService"
-import { getStationLatestImage } from "@/services/stationsService"
+import { getAllStations, getStationDashboard } from "@/services/stationsService"
+import { subscribeToReadings } from "@/services/sensorService"
 import { getPermittedStations } from "@/utils/permissions"
 import type { Station, SensorReading, WeatherForecast, StationImage } from "@/types"
 import { StationSelector } from "@/components/dashboard/StationSelector"
@@ -57,30 +56,42 @@ export default function DashboardPage() {
   useEffect(() => {
     if (!selectedStationId) return
 
+    let cancelled = false
+
     const loadStationData = async () => {
       const station = allStations.find((s) => s.id === selectedStationId)
       setSelectedStation(station || null)
 
-      // Load latest sensor reading
-      const reading = await getLatestSensorReading(selectedStationId)
-      setLatestReading(reading)
-
-      // Load weather forecast if weather station
-      if (station?.type === "weather") {
-        const forecastData = await getWeatherForecast(selectedStationId)
-        setForecast(forecastData)
-      } else {
-        setForecast([])
-      }
+      // Latest reading, forecast and image arrive together in one request
+      const dashboard = await getStationDashboard(selectedStationId)
+      if (cancelled) return
 
-      // Load latest station image
-      const image = await getStationLatestImage(selectedStationId)
-      setStationImage(image)
+      setSelectedStation(dashboard?.station ?? station ?? null)
+      setLatestReading(dashboard?.latestReading ?? null)
+      setForecast(dashboard?.station.type === "weather" ? dashboard.forecast : [])
+      setStationImage(dashboard?.latestImage ?? null)
     }
 
     loadStationData()
+    return () => {
+      cancelled = true
+    }
   }, [selectedStationId, allStations])
 
+  // Keep the latest reading current with readings pushed by the server
+  useEffect(() => {
+    if (!selectedStationId) return
+
+    return subscribeToReadings([selectedStationId], (reading) => {
+      setLatestReading((current) => (current && current.timestamp > reading.timestamp ? current : reading))
+      setSelectedStation((current) =>
+        current && (!current.lastDataTime || current.lastDataTime < reading.timestamp)
+          ? { ...current, lastDataTime: reading.timestamp }
+          : current,
+      )
+    })
+  }, [selectedStationId])
+
   if (isLoading) {
     return (
       <div className="space-y-6">
@@ -9,9 +9,9 @@
 import { useState, useEffect } from "react"
 import { useAuth } from "@/contexts/AuthContext"
 import { getAllStations } from "@/services/stationsService"
-import { getSensorReadings, getDailyAggregates } from "@/services/sensorService"
+import { getDailyAggregates } from "@/services/sensorService"
 import { getPermittedStations } from "@/utils/permissions"
-import { exportSensorDataToCSV, exportDailyDataToCSV } from "@/services/exportService"
+import { downloadSensorDataExport, exportDailyDataToCSV } from "@/services/exportService"
 import { getSensorDisplayName } from "@/utils/chartUtils"
 import type { Station, TimeRange } from "@/types"
 import { StationSelector } from "@/components/dashboard/StationSelector"
@@ -104,8 +104,7 @@ export default function DownloadPage() {
 
     try {
       if (category === "timeseries") {
-        const readings = await getSensorReadings(selectedStationId, timeRange)
-        exportSensorDataToCSV(selectedStation.name, readings, selectedSensors, timeRange)
+        downloadSensorDataExport(selectedStationId, selectedSensors, timeRange)
       } else {
         const aggregates = await getDailyAggregates(selectedStationId, timeRange)
         exportDailyDataToCSV(selectedStation.name, aggregates, timeRange)
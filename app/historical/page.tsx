@@ -11,7 +11,7 @@ import { useAuth } from "@/contexts/AuthContext"
 import { getAllStations } from "@/services/stationsService"
 import { getSensorReadings } from "@/services/sensorService"
 import { getPermittedStations } from "@/utils/permissions"
-import { exportSensorDataToCSV } from "@/services/exportService"
+import { downloadSensorDataExport } from "@/services/exportService"
 import { formatSensorDataForChart, getSensorDisplayName } from "@/utils/chartUtils"
 import type { Station, SensorReading, TimeRange } from "@/types"
 import { StationSelector } from "@/components/dashboard/StationSelector"
@@ -102,10 +102,10 @@ export default function HistoricalDataPage() {
     setSelectedSensors((prev) => (prev.includes(sensor) ? prev.filter((s) => s !== sensor) : [...prev, sensor]))
   }
 
-  // Handle CSV export
+  // Handle CSV export; the chart holds downsampled points, so the file is streamed from the raw readings
   const handleExport = () => {
-    if (!selectedStation) return
-    exportSensorDataToCSV(selectedStation.name, readings, selectedSensors, timeRange)
+    if (!selectedStation || !selectedStationId) return
+    downloadSensorDataExport(selectedStationId, selectedSensors, timeRange)
   }
 
   if (isLoading) {
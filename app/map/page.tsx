@@ -9,10 +9,10 @@
 import { useState, useEffect, useCallback } from "react"
 import { useAuth } from "@/contexts/AuthContext"
 import { useRouter } from "next/navigation"
-import { getAllStations, getStationLatestImage } from "@/services/stationsService"
-import { getLatestSensorReading } from "@/services/sensorService"
+import { getFleetSnapshot } from "@/services/stationsService"
+import { subscribeToReadings } from "@/services/sensorService"
 import { getPermittedStations } from "@/utils/permissions"
-import type { Station, SensorReading, StationImage } from "@/types"
+import type { Station, SensorReading, StationImage, StationSnapshot } from "@/types"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
 import { Badge } from "@/components/ui/badge"
@@ -28,6 +28,7 @@ export default function MapPage() {
   const { user } = useAuth()
   const router = useRouter()
   const [allStations, setAllStations] = useState<Station[]>([])
+  const [snapshots, setSnapshots] = useState<Record<string, StationSnapshot>>({})
   const [permittedStations, setPermittedStations] = useState<Station[]>([])
   const [mapFilter, setMapFilter] = useState<string>("all")
   const [selectedStationId, setSelectedStationId] = useState<string | null>(null)
@@ -39,7 +40,9 @@ export default function MapPage() {
   // Load stations on mount
   useEffect(() => {
     const loadData = async () => {
-      const stations = await getAllStations()
+      const fleet = await getFleetSnapshot()
+      const stations = fleet.map((snapshot) => snapshot.station)
+      setSnapshots(Object.fromEntries(fleet.map((snapshot) => [snapshot.station.id, snapshot])))
       setAllStations(stations)
       const permitted = getPermittedStations(user, stations)
       setPermittedStations(permitted)
@@ -55,6 +58,24 @@ export default function MapPage() {
     loadData()
   }, [user])
 
+  // Update station snapshots with readings pushed by the server
+  useEffect(() => {
+    if (permittedStations.length === 0) return
+
+    return subscribeToReadings(
+      permittedStations.map((station) => station.id),
+      (reading) => {
+        setSnapshots((current) => {
+          const snapshot = current[reading.stationId]
+          if (!snapshot || (snapshot.latestReading && snapshot.latestReading.timestamp > reading.timestamp)) {
+            return current
+          }
+          return { ...current, [reading.stationId]: { ...snapshot, latestReading: reading } }
+        })
+      },
+    )
+  }, [permittedStations])
+
   // Load station details when selected
   useEffect(() => {
     if (!selectedStationId) {
@@ -72,26 +93,10 @@ export default function MapPage() {
       return
     }
 
-    let isCancelled = false
     setSelectedStation(station)
-
-    const loadDetails = async () => {
-      const [reading, image] = await Promise.all([
-        getLatestSensorReading(station.id),
-        getStationLatestImage(station.id),
-      ])
-
-      if (isCancelled) return
-      setSelectedReading(reading)
-      setSelectedImage(image)
-    }
-
-    loadDetails()
-
-    return () => {
-      isCancelled = true
-    }
-  }, [selectedStationId, allStations])
+    setSelectedReading(snapshots[station.id]?.latestReading ?? null)
+    setSelectedImage(snapshots[station.id]?.latestImage ?? null)
+  }, [selectedStationId, allStations, snapshots])
 
   // Navigate to station dashboard
   const navigateToStation = (stationId: string) => {
@@ -0,0 +1,22 @@
+import hmac
+import os
+
+from fastapi import HTTPException, Request
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+ADMIN_HEADER = "x-admin-token"
+
+
+def token_matches(supplied: str, expected: str) -> bool:
+    # An unset token disables the feature rather than accepting an empty one.
+    return bool(expected) and hmac.compare_digest(supplied.encode(), expected.encode())
+
+
+def require_token(expected: str, header: str):
+    """Dependency that answers 403 unless the request's header carries the expected token."""
+
+    def dependency(request: Request) -> None:
+        if not token_matches(request.headers.get(header, ""), expected):
+            raise HTTPException(status_code=403, detail="Admin token required")
+
+    return dependency
@@ -0,0 +1,55 @@
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import SensorReading
+
+AGGREGATE_TIMEZONE = os.getenv("AGGREGATE_TIMEZONE", "Asia/Bangkok")
+
+AGGREGATE_FIELDS = {
+    "avg_temperature": ("avg", "air_temperature"),
+    "min_temperature": ("min", "air_temperature"),
+    "max_temperature": ("max", "air_temperature"),
+    "avg_humidity": ("avg", "relative_humidity"),
+    "min_humidity": ("min", "relative_humidity"),
+    "max_humidity": ("max", "relative_humidity"),
+    "avg_light_intensity": ("avg", "light_intensity"),
+    "avg_wind_speed": ("avg", "wind_speed"),
+    "avg_pressure": ("avg", "atmospheric_pressure"),
+    "min_pressure": ("min", "atmospheric_pressure"),
+    "max_pressure": ("max", "atmospheric_pressure"),
+    "avg_soil_moisture1": ("avg", "soil_moisture1"),
+    "avg_soil_moisture2": ("avg", "soil_moisture2"),
+    "avg_vpd": ("avg", "vpd"),
+    "total_rainfall": ("sum", "rainfall"),
+}
+
+
+def resolve_timezone(name: str) -> str:
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {name}")
+    return name
+
+
+def aggregate_readings(
+    db: Session, station_id: str, bucket: str, start: datetime, tz: str
+) -> List[Dict[str, Any]]:
+    local_bucket = func.date_trunc(bucket, func.timezone(tz, SensorReading.timestamp))
+    bucket_start = func.timezone(tz, local_bucket).label("bucket")
+    columns = [
+        getattr(func, aggregate)(getattr(SensorReading, column)).label(name)
+        for name, (aggregate, column) in AGGREGATE_FIELDS.items()
+    ]
+    query = (
+        select(bucket_start, func.count().label("reading_count"), *columns)
+        .where(SensorReading.station_id == station_id, SensorReading.timestamp >= start)
+        .group_by(bucket_start)
+        .order_by(bucket_start)
+    )
+    return [dict(row, station_id=station_id) for row in db.execute(query).mappings()]
@@ -0,0 +1,149 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import handlers
+from .aggregates import AGGREGATE_TIMEZONE
+from .db import get_async_db
+from .reference import cached_forecast
+from .schemas import (
+    ChangesOut,
+    ReadingAggregateOut,
+    SensorReadingBatch,
+    SensorReadingBatchOut,
+    SensorReadingCreate,
+    SensorReadingOut,
+    SensorReadingPage,
+    StationDashboardOut,
+    StationImageOut,
+    StationOut,
+    StationSnapshotOut,
+    WeatherForecastOut,
+)
+from .snapshot import fleet_snapshot
+from .versions import FORECAST_TABLES, IMAGE_TABLES, STATION_TABLES, async_conditional_get
+
+# AsyncSession.run_sync runs handlers on the event loop thread, so only routes that mostly wait on
+# the database live here. The numpy-heavy ones (columns, wind rose, heatmap, compare, statistics)
+# stay on the synchronous routes in main.py, which FastAPI runs in its threadpool.
+router = APIRouter(include_in_schema=False)
+
+
+@router.get("/stations", response_model=Union[List[StationOut], ChangesOut[StationOut]])
+async def list_stations(
+    owner_id: Optional[str] = None,
+    since: Optional[str] = None,
+    validators: Dict[str, str] = Depends(async_conditional_get(*STATION_TABLES)),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    return await db.run_sync(handlers.list_stations, owner_id, since, validators)
+
+
+@router.get("/stations/snapshot", response_model=List[StationSnapshotOut])
+async def get_fleet_snapshot(
+    station_id: Optional[List[str]] = Query(None),
+    owner_id: Optional[str] = None,
+    area: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> List[dict]:
+    return await db.run_sync(fleet_snapshot, station_id, owner_id, area)
+
+
+@router.get("/stations/{station_id}/dashboard", response_model=StationDashboardOut)
+async def get_station_dashboard(station_id: str, db: AsyncSession = Depends(get_async_db)) -> dict:
+    return await db.run_sync(handlers.get_station_dashboard, station_id)
+
+
+@router.get("/stations/{station_id}", response_model=StationOut)
+async def get_station(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(async_conditional_get(*STATION_TABLES)),
+    db: AsyncSession = Depends(get_async_db),
+) -> dict:
+    station = await db.run_sync(handlers.get_station, station_id, validators.get("ETag"))
+    response.headers.update(validators)
+    return station
+
+
+@router.get("/stations/{station_id}/images/latest", response_model=StationImageOut)
+async def get_latest_station_image(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(async_conditional_get(*IMAGE_TABLES)),
+    db: AsyncSession = Depends(get_async_db),
+) -> Any:
+    image = await db.run_sync(handlers.get_latest_station_image, station_id)
+    response.headers.update(validators)
+    return image
+
+
+@router.get("/stations/{station_id}/forecast", response_model=List[WeatherForecastOut])
+async def get_station_forecast(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(async_conditional_get(*FORECAST_TABLES)),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[dict]:
+    response.headers.update(validators)
+    return await db.run_sync(cached_forecast, station_id, validators.get("ETag"))
+
+
+@router.get(
+    "/stations/{station_id}/readings",
+    response_model=Union[List[SensorReadingOut], ChangesOut[SensorReadingOut]],
+)
+async def list_readings(
+    station_id: str,
+    limit: int = Query(100, ge=1, le=1000),
+    days: Optional[int] = Query(None, ge=1, le=365),
+    since: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    return await db.run_sync(handlers.list_readings, station_id, limit, days, since)
+
+
+@router.get("/stations/{station_id}/readings/page", response_model=SensorReadingPage)
+async def list_readings_page(
+    station_id: str,
+    limit: int = Query(500, ge=1, le=5000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db),
+) -> SensorReadingPage:
+    return await db.run_sync(handlers.list_readings_page, station_id, limit, start, end, cursor, order)
+
+
+@router.get("/stations/{station_id}/readings/aggregate", response_model=List[ReadingAggregateOut])
+async def aggregate_station_readings(
+    station_id: str,
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=3660),
+    tz: str = Query(AGGREGATE_TIMEZONE),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[dict]:
+    return await db.run_sync(handlers.aggregate_station_readings, station_id, bucket, days, tz)
+
+
+@router.post("/stations/{station_id}/readings", response_model=SensorReadingOut, status_code=status.HTTP_201_CREATED)
+async def create_reading(
+    station_id: str,
+    payload: SensorReadingCreate,
+    response: Response,
+    on_conflict: str = Query("ignore", pattern="^(ignore|update)$"),
+    db: AsyncSession = Depends(get_async_db),
+) -> Any:
+    return await db.run_sync(handlers.create_reading, station_id, payload, response, on_conflict)
+
+
+@router.post("/readings/batch", response_model=SensorReadingBatchOut)
+async def create_readings_batch(
+    payload: SensorReadingBatch,
+    on_conflict: str = Query("ignore", pattern="^(ignore|update)$"),
+    db: AsyncSession = Depends(get_async_db),
+) -> SensorReadingBatchOut:
+    return await db.run_sync(handlers.create_readings_batch, payload.readings, on_conflict)
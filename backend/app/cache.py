@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from .pubsub import PostgresListener
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+# Raised by the table_versions trigger with the written table's name as payload.
+INVALIDATION_CHANNEL = "table_versions"
+
+if CACHE_BACKEND not in ("memory", "postgres"):
+    raise ValueError(f"CACHE_BACKEND must be one of memory, postgres (got {CACHE_BACKEND!r})")
+
+
+class TableCache:
+    """Bounded LRU cache with a TTL whose entries are invalidated per source table.
+
+    Every entry remembers the generation of each table it was loaded from; invalidating a table
+    bumps its generation, so stale entries are rejected on lookup and age out of the LRU order.
+    Generations are captured before loading, which keeps a write that lands mid-load from being
+    cached under the new generation.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, Tuple[float, Tuple[int, ...], Any]]" = OrderedDict()
+        self.generations: Dict[str, int] = {}
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def current(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        return (self.epoch, *(self.generations.get(table, 0) for table in tables))
+
+    def snapshot(self, tables: Sequence[str]) -> Tuple[int, ...]:
+        with self.lock:
+            return self.current(tables)
+
+    def lookup(self, key: Hashable, tables: Sequence[str]) -> Tuple[bool, Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, generations, value = entry
+                if expires_at > time.monotonic() and generations == self.current(tables):
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+    def store(self, key: Hashable, generations: Tuple[int, ...], value: Any) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, generations, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, tables: Sequence[str], load: Callable[[], Any]) -> Any:
+        hit, value = self.lookup(key, tables)
+        if hit:
+            return value
+        generations = self.snapshot(tables)
+        value = load()
+        self.store(key, generations, value)
+        return value
+
+    def invalidate(self, *tables: str) -> None:
+        with self.lock:
+            for table in tables:
+                self.generations[table] = self.generations.get(table, 0) + 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.epoch += 1
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+table_cache = TableCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+_listener: Optional[PostgresListener] = None
+
+
+def start_invalidation_listener(sync_engine) -> None:
+    """Let every worker drop entries that another worker (or any other writer) invalidated.
+
+    After a reconnect the whole cache is cleared, since invalidations sent meanwhile are gone.
+    """
+    global _listener
+    if CACHE_BACKEND == "postgres" and _listener is None:
+        _listener = PostgresListener(
+            sync_engine, INVALIDATION_CHANNEL, lambda tables: table_cache.invalidate(*set(tables)), table_cache.clear
+        )
+        _listener.start()
+
+
+def stop_invalidation_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
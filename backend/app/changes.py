@@ -0,0 +1,168 @@
+import base64
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, literal, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from .models import CURRENT_TXID, DeletedRow, PlotActivity, SensorReading, SimPayment, Station, StationLatestReading
+
+CHANGES_PAGE_SIZE = 1000
+CHANGE_TRIGGER = "set_change_txid"
+DELETION_TRIGGER = "record_deleted_row"
+TRACKED_TABLES = (
+    Station.__table__,
+    StationLatestReading.__table__,
+    PlotActivity.__table__,
+    SimPayment.__table__,
+    SensorReading.__table__,
+)
+# The latest-reading table only feeds Station.last_data_time; its rows are never listed or deleted on their own.
+TOMBSTONED_TABLES = tuple(table for table in TRACKED_TABLES if table is not StationLatestReading.__table__)
+SNAPSHOT_XMIN = text("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+def install_change_tracking(connection) -> None:
+    """Add change_txid to tables created before change tracking, and keep it current on UPDATE.
+
+    Existing rows get change_txid 0 so adding the column never rewrites a large table; they are
+    still returned by a since=0 sync. Deletes leave a tombstone in deleted_rows, recorded under
+    the parent table name (TG_TABLE_NAME would name the partition for sensor_readings).
+    """
+    connection.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION {CHANGE_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                NEW.change_txid := {CURRENT_TXID.text};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    connection.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION {DELETION_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO deleted_rows (table_name, row_id, station_id)
+                VALUES (TG_ARGV[0], OLD.id, COALESCE(to_jsonb(OLD) ->> 'station_id', OLD.id));
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    existing = set(
+        connection.execute(
+            text(
+                "SELECT tgname || ':' || tgrelid::regclass::text FROM pg_trigger WHERE tgname IN (:change, :deletion)"
+            ),
+            {"change": CHANGE_TRIGGER, "deletion": DELETION_TRIGGER},
+        ).scalars()
+    )
+    tracked = set(
+        connection.execute(
+            text("SELECT table_name FROM information_schema.columns WHERE column_name = 'change_txid'")
+        ).scalars()
+    )
+    for table in TRACKED_TABLES:
+        if table.name not in tracked:
+            connection.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN change_txid bigint NOT NULL DEFAULT 0'))
+            connection.execute(
+                text(f'ALTER TABLE "{table.name}" ALTER COLUMN change_txid SET DEFAULT {CURRENT_TXID.text}')
+            )
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+        if f"{CHANGE_TRIGGER}:{table.name}" not in existing:
+            connection.execute(
+                text(
+                    f'CREATE TRIGGER {CHANGE_TRIGGER} BEFORE UPDATE ON "{table.name}" '
+                    f"FOR EACH ROW EXECUTE FUNCTION {CHANGE_TRIGGER}()"
+                )
+            )
+        if table in TOMBSTONED_TABLES and f"{DELETION_TRIGGER}:{table.name}" not in existing:
+            connection.execute(
+                text(
+                    f'CREATE TRIGGER {DELETION_TRIGGER} AFTER DELETE ON "{table.name}" '
+                    f"FOR EACH ROW EXECUTE FUNCTION {DELETION_TRIGGER}('{table.name}')"
+                )
+            )
+
+
+def encode_change_cursor(floor: int, next_floor: Optional[int] = None, after: Optional[Tuple[int, str]] = None) -> str:
+    payload: Dict[str, Any] = {"f": floor}
+    if after is not None:
+        payload.update({"n": next_floor, "t": after[0], "id": after[1]})
+    encoded = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(encoded.encode()).decode().rstrip("=")
+
+
+def decode_change_cursor(cursor: str) -> Tuple[int, Optional[int], Optional[Tuple[int, str]]]:
+    if cursor == "0":
+        return 0, None, None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if "t" not in payload:
+            return int(payload["f"]), None, None
+        return int(payload["f"]), int(payload["n"]), (int(payload["t"]), str(payload["id"]))
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid since cursor")
+
+
+def list_changes(
+    db: Session,
+    query,
+    change_txid,
+    row_id,
+    table_name: str,
+    since: str,
+    station_id: Optional[str] = None,
+    limit: int = CHANGES_PAGE_SIZE,
+) -> Dict[str, Any]:
+    """Rows written and ids deleted by every transaction not already covered by the since cursor.
+
+    The cursor floor is the snapshot xmin taken before reading, so a transaction still in flight
+    during one sync (whatever its id) is picked up by the next one. Delivery is at-least-once:
+    apply `deleted` before `items`, upsert items by id, and pass `cursor` back as since. While
+    has_more is true the cursor continues the same pass in (change_txid, id) order; deletions are
+    returned with the first page of each pass.
+    """
+    floor, next_floor, after = decode_change_cursor(since)
+    if next_floor is None:
+        next_floor = db.scalar(select(SNAPSHOT_XMIN))
+
+    query = query.add_columns(change_txid.label("change_txid")).where(change_txid >= floor)
+    if after is not None:
+        query = query.where(tuple_(change_txid, row_id) > tuple_(literal(after[0]), literal(after[1])))
+    result = db.execute(query.limit(None).order_by(None).order_by(change_txid, row_id).limit(limit + 1))
+    keys = [key for key in result.keys() if key != "change_txid"]
+    rows = result.all()
+
+    deleted = []
+    if after is None:
+        tombstones = select(DeletedRow.row_id).where(DeletedRow.table_name == table_name, DeletedRow.change_txid >= floor)
+        if station_id:
+            tombstones = tombstones.where(DeletedRow.station_id == station_id)
+        deleted = list(db.scalars(tombstones.order_by(DeletedRow.change_txid, DeletedRow.id)))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if has_more:
+        last = rows[-1]
+        cursor = encode_change_cursor(floor, next_floor, (last.change_txid, last.id))
+    else:
+        cursor = encode_change_cursor(next_floor)
+    return {
+        "items": [dict(zip(keys, row)) for row in rows],
+        "deleted": deleted,
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+def station_change_txid():
+    # A new reading changes a station's last_data_time without touching the stations row.
+    return func.greatest(Station.change_txid, StationLatestReading.change_txid)
@@ -0,0 +1,105 @@
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .downsampling import downsample_columns
+from .models import SensorReading
+
+COLUMNAR_MAX_ROWS = 100_000
+COLUMNAR_MEDIA_TYPE = "application/vnd.wimarc.columns"
+
+
+def columns_query(
+    station_id: str, sensors: Sequence[str], start: Optional[datetime], end: Optional[datetime]
+):
+    columns = [SensorReading.timestamp] + [getattr(SensorReading, field) for field in sensors]
+    query = select(*columns).where(SensorReading.station_id == station_id)
+    if start:
+        query = query.where(SensorReading.timestamp >= start)
+    if end:
+        query = query.where(SensorReading.timestamp < end)
+    return query
+
+
+def to_columns(station_id: str, sensors: Sequence[str], rows: Sequence) -> Dict:
+    values = list(zip(*rows)) if rows else [()] * (len(sensors) + 1)
+    return {
+        "station_id": station_id,
+        "count": len(rows),
+        "timestamps": [int(timestamp.timestamp() * 1000) for timestamp in values[0]],
+        "fields": {field: list(column) for field, column in zip(sensors, values[1:])},
+    }
+
+
+def reading_columns(
+    db: Session,
+    station_id: str,
+    sensors: Sequence[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    limit: int,
+) -> Dict:
+    query = columns_query(station_id, sensors, start, end)
+    # Newest rows win when the limit cuts the range, matching the row-oriented endpoint.
+    rows = db.execute(query.order_by(SensorReading.timestamp.desc()).limit(limit)).all()
+    rows.reverse()
+    return to_columns(station_id, sensors, rows)
+
+
+def downsampled_reading_columns(
+    db: Session,
+    station_id: str,
+    sensors: Sequence[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    max_points: int,
+    method: str,
+) -> Dict:
+    """Downsample the whole range, however many rows it holds.
+
+    Rows are streamed oldest first in chunks of COLUMNAR_MAX_ROWS; each chunk is reduced to
+    max_points on its own and the kept rows are reduced once more, so memory stays bounded.
+    """
+    result = db.execute(
+        columns_query(station_id, sensors, start, end).order_by(SensorReading.timestamp),
+        execution_options={"yield_per": COLUMNAR_MAX_ROWS},
+    )
+    merged = to_columns(station_id, sensors, [])
+    for rows in result.partitions():
+        chunk = downsample_columns(to_columns(station_id, sensors, rows), max_points, method)
+        merged["count"] += chunk["count"]
+        merged["timestamps"] += chunk["timestamps"]
+        for field, values in chunk["fields"].items():
+            merged["fields"][field] += values
+    return downsample_columns(merged, max_points, method)
+
+
+def pack_columns(columns: Dict) -> bytes:
+    """Pack columns as a length-prefixed JSON header followed by little-endian arrays.
+
+    Layout: uint32 header length, UTF-8 JSON header (station_id, count, fields), zero padding to
+    an 8-byte boundary, float64 epoch-millisecond timestamps, then one float32 array per field in
+    header order with NaN for missing values.
+    """
+    header = json.dumps(
+        {"station_id": columns["station_id"], "count": columns["count"], "fields": list(columns["fields"])},
+        separators=(",", ":"),
+    ).encode()
+    prefix = struct.pack("<I", len(header)) + header
+    parts: List[bytes] = [prefix, b"\0" * (-len(prefix) % 8)]
+
+    buffers = [array("d", columns["timestamps"])]
+    nan = float("nan")
+    for values in columns["fields"].values():
+        buffers.append(array("f", [nan if value is None else value for value in values]))
+    for buffer in buffers:
+        if sys.byteorder != "little":
+            buffer.byteswap()
+        parts.append(buffer.tobytes())
+    return b"".join(parts)
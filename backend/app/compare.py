@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+from sqlalchemy import Interval, and_, func, literal, select, true
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from .aggregates import AGGREGATE_TIMEZONE
+from .models import SensorReading
+from .rollups import ROLLUP_TABLES
+
+MAX_COMPARE_STATIONS = 50
+MAX_COMPARE_CELLS = 200_000
+BUCKET_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# Rainfall is compared as a bucket total, every other sensor as a bucket mean.
+SUMMED_FIELDS = ("rainfall",)
+
+
+def bucket_count(bucket: str, start: datetime, end: datetime) -> int:
+    return int((end - start) / BUCKET_STEPS[bucket]) + 1
+
+
+def bucket_source(bucket: str, sensors: Sequence[str], station_ids: Sequence[str], start, end, tz: str):
+    first_bucket = func.timezone(tz, func.date_trunc(bucket, func.timezone(tz, start)))
+    if tz == AGGREGATE_TIMEZONE:
+        table = ROLLUP_TABLES[bucket]
+        columns = [
+            (
+                table.c[f"{field}_sum"]
+                if field in SUMMED_FIELDS
+                else table.c[f"{field}_sum"] / func.nullif(table.c[f"{field}_count"], 0)
+            ).label(field)
+            for field in sensors
+        ]
+        return (
+            select(table.c.station_id, table.c.bucket, *columns)
+            .where(table.c.station_id.in_(station_ids), table.c.bucket >= first_bucket, table.c.bucket <= end)
+            .subquery("source")
+        )
+
+    local_bucket = func.date_trunc(bucket, func.timezone(tz, SensorReading.timestamp))
+    bucket_start = func.timezone(tz, local_bucket).label("bucket")
+    columns = [
+        (func.sum if field in SUMMED_FIELDS else func.avg)(getattr(SensorReading, field)).label(field)
+        for field in sensors
+    ]
+    return (
+        select(SensorReading.station_id, bucket_start, *columns)
+        .where(
+            SensorReading.station_id.in_(station_ids),
+            SensorReading.timestamp >= first_bucket,
+            SensorReading.timestamp <= end,
+        )
+        .group_by(SensorReading.station_id, bucket_start)
+        .subquery("source")
+    )
+
+
+def compare_stations(
+    db: Session,
+    station_ids: Sequence[str],
+    sensors: Sequence[str],
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    tz: str,
+    fill: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Bucket every station onto one shared time axis in a single query.
+
+    The axis is generated in local time and cross-joined with the stations, so buckets without
+    readings come back as NULL instead of going missing. Each field is returned as one row per
+    station, in the order the stations were requested; station_ids must not repeat.
+    """
+    step = literal(BUCKET_STEPS[bucket], Interval)
+    series = func.generate_series(
+        func.date_trunc(bucket, func.timezone(tz, start)),
+        func.date_trunc(bucket, func.timezone(tz, end)),
+        step,
+    ).table_valued("local_bucket").render_derived()
+    axis = select(func.timezone(tz, series.c.local_bucket).label("bucket")).subquery("axis")
+    stations = (
+        func.unnest(array(list(station_ids)))
+        .table_valued("station_id", with_ordinality="position")
+        .render_derived()
+    )
+    source = bucket_source(bucket, sensors, station_ids, start, end, tz)
+
+    query = (
+        select(stations.c.station_id, axis.c.bucket, *[source.c[field] for field in sensors])
+        .select_from(axis)
+        .join(stations, true())
+        .outerjoin(
+            source,
+            and_(source.c.station_id == stations.c.station_id, source.c.bucket == axis.c.bucket),
+        )
+        .order_by(stations.c.position, axis.c.bucket)
+    )
+
+    rows = db.execute(query).all()
+    per_station = len(rows) // len(station_ids)
+    buckets = [row.bucket for row in rows[:per_station]]
+    fields = {
+        field: [
+            [row[index] for row in rows[position * per_station : (position + 1) * per_station]]
+            for position in range(len(station_ids))
+        ]
+        for index, field in enumerate(sensors, start=2)
+    }
+
+    if fill == "previous":
+        for matrix in fields.values():
+            for values in matrix:
+                previous = None
+                for index, value in enumerate(values):
+                    if value is None:
+                        values[index] = previous
+                    else:
+                        previous = value
+
+    return {
+        "bucket": bucket,
+        "timezone": tz,
+        "stations": list(station_ids),
+        "buckets": buckets,
+        "fields": fields,
+    }
@@ -1,13 +1,77 @@
 import os
+import time
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from .metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql+psycopg2://wimarc:wimarc@db:5432/wimarc")
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() in ("1", "true", "yes")
+
+
+def asyncpg_url(url: str) -> str:
+    # Replace whatever driver DATABASE_URL names, or the implied default, with asyncpg.
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or asyncpg_url(DATABASE_URL)
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_PRE_PING = os.getenv("DB_PRE_PING", "always").lower()
+DB_PRE_PING_IDLE_SECONDS = float(os.getenv("DB_PRE_PING_IDLE_SECONDS", "60"))
+
+if DB_PRE_PING not in ("always", "idle", "never"):
+    raise ValueError(f"DB_PRE_PING must be one of always, idle, never (got {DB_PRE_PING!r})")
+
+
+def pool_options(poolclass) -> dict:
+    return {
+        "poolclass": poolclass,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_PRE_PING == "always",
+    }
+
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+def ping_idle_connections(sync_engine) -> None:
+    @event.listens_for(sync_engine, "checkin")
+    def record_checkin(dbapi_connection, connection_record) -> None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(sync_engine, "checkout")
+    def ping_if_idle(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < DB_PRE_PING_IDLE_SECONDS:
+            return
+        try:
+            sync_engine.dialect.do_ping(dbapi_connection)
+        except Exception as error:
+            raise exc.DisconnectionError() from error
+
+
+engine = create_engine(DATABASE_URL, **pool_options(InstrumentedQueuePool))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(InstrumentedAsyncQueuePool)) if ASYNC_DATABASE else None
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+if DB_PRE_PING == "idle":
+    ping_idle_connections(engine)
+    if async_engine is not None:
+        ping_idle_connections(async_engine.sync_engine)
+
 Base = declarative_base()
 
 
@@ -17,3 +81,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
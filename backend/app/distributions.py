@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Sequence
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import Float, Integer, cast, func, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.orm import Session
+
+from .models import SensorReading
+
+WIND_SPEED_BINS = (0.5, 2.0, 4.0, 6.0, 8.0, 11.0)
+
+
+def reading_range(query, station_id: str, start: datetime, end: datetime):
+    return query.where(
+        SensorReading.station_id == station_id,
+        SensorReading.timestamp >= start,
+        SensorReading.timestamp < end,
+    )
+
+
+def wind_rose(
+    db: Session,
+    station_id: str,
+    start: datetime,
+    end: datetime,
+    sectors: int = 16,
+    speed_bins: Sequence[float] = WIND_SPEED_BINS,
+) -> Dict[str, Any]:
+    """Count readings per (direction sector, speed bin).
+
+    Sector 0 is centred on north. Speed bin i covers [speed_bins[i - 1], speed_bins[i]); readings
+    below speed_bins[0] are calm and have no meaningful direction, so they are only counted.
+    """
+    width = 360.0 / sectors
+    # 360 degrees lands in sector `sectors`, which is folded back onto north below.
+    direction = cast(SensorReading.wind_direction, Float)
+    sector = cast(func.floor((direction + width / 2) / width), Integer).label("sector")
+    speed = cast(SensorReading.wind_speed, Float)
+    speed_bin = func.width_bucket(speed, array([float(bound) for bound in speed_bins])).label("speed_bin")
+
+    query = reading_range(select(sector, speed_bin, func.count().label("readings")), station_id, start, end).where(
+        SensorReading.wind_direction.isnot(None), SensorReading.wind_speed.isnot(None)
+    )
+    rows = db.execute(query.group_by(sector, speed_bin)).all()
+
+    counts = np.zeros((sectors, len(speed_bins)), dtype=np.int64)
+    calm = 0
+    for row_sector, row_bin, readings in rows:
+        if row_bin == 0:
+            calm += readings
+        else:
+            counts[row_sector % sectors, row_bin - 1] += readings
+    total = int(counts.sum()) + calm
+
+    return {
+        "station_id": station_id,
+        "total": total,
+        "calm": calm,
+        "directions": [index * width for index in range(sectors)],
+        "speed_bins": list(speed_bins),
+        "counts": counts,
+        "frequencies": counts / total * 100 if total else counts.astype(np.float64),
+    }
+
+
+def hourly_heatmap(
+    db: Session,
+    station_id: str,
+    field: str,
+    start: datetime,
+    end: datetime,
+    tz: str,
+    statistic: str = "avg",
+) -> Dict[str, Any]:
+    """One row per local calendar day and one column per local hour, NaN (null) where empty."""
+    local_time = func.timezone(tz, SensorReading.timestamp)
+    day = func.date(local_time)
+    hour = cast(func.extract("hour", local_time), Integer)
+    value = getattr(func, statistic)(getattr(SensorReading, field))
+
+    query = reading_range(select(day.label("day"), hour.label("hour"), value), station_id, start, end)
+    rows = db.execute(query.where(getattr(SensorReading, field).isnot(None)).group_by(day, hour)).all()
+
+    zone = ZoneInfo(tz)
+    first_day = start.astimezone(zone).date()
+    last_day = end.astimezone(zone).date()
+    days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+    values = np.full((len(days), 24), np.nan)
+    if rows:
+        row_days, row_hours, row_values = zip(*rows)
+        day_index = np.fromiter(((row_day - first_day).days for row_day in row_days), np.int64, len(rows))
+        values[day_index, np.asarray(row_hours, dtype=np.int64)] = np.asarray(row_values, dtype=np.float64)
+
+    return {
+        "station_id": station_id,
+        "sensor": field,
+        "statistic": statistic,
+        "timezone": tz,
+        "days": days,
+        "values": values,
+    }
@@ -0,0 +1,92 @@
+from typing import Dict
+
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets: keep the first and last points plus one point per bucket.
+
+    Each bucket's pick depends on the previous one, so buckets are walked in order, but the
+    triangle areas inside a bucket and the next-bucket averages are computed with array ops.
+    """
+    n = len(x)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sum_x = np.concatenate(([0.0], np.cumsum(x)))
+    sum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges).astype(np.float64)
+    avg_x = np.append((sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts, x[-1])[1:]
+    avg_y = np.append((sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts, y[-1])[1:]
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        anchor_x, anchor_y = x[selected[bucket]], y[selected[bucket]]
+        area = np.abs(
+            (anchor_x - avg_x[bucket]) * (y[start:end] - anchor_y)
+            - (anchor_x - x[start:end]) * (avg_y[bucket] - anchor_y)
+        )
+        selected[bucket + 1] = start + int(np.argmax(area))
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """Min/max envelope: the lowest and highest point of each of max_points / 2 equal-count buckets."""
+    n = len(y)
+    buckets = max_points // 2
+    if max_points >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    segment = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorting by (segment, value) puts each bucket's minimum first and maximum last.
+    order = np.lexsort((y, segment))
+    return np.union1d(order[edges[:-1]], order[edges[1:] - 1])
+
+
+def downsample_columns(columns: Dict, max_points: int, method: str = "lttb") -> Dict:
+    """Reduce columnar readings to at most max_points rows.
+
+    The row budget is split between the sensor series that have data, and each is downsampled on
+    its own non-missing values. The rows any series keeps are returned for every field, so all
+    values in the result are real readings. When the split leaves a series too few points to pick
+    from, evenly spaced rows are returned instead.
+    """
+    count = columns["count"]
+    if count <= max_points:
+        return columns
+
+    timestamps = np.asarray(columns["timestamps"], dtype=np.float64)
+    timestamps -= timestamps[0]
+    series = []
+    for values in columns["fields"].values():
+        y = np.array(values, dtype=np.float64)
+        present = np.flatnonzero(~np.isnan(y))
+        if len(present):
+            series.append((present, y[present]))
+
+    budget = max_points // len(series) if series else 0
+    if budget < (2 if method == "minmax" else 3):
+        rows = np.unique(np.linspace(0, count - 1, max_points).astype(np.int64))
+    else:
+        keep = []
+        for present, y in series:
+            if method == "minmax":
+                picked = minmax_indices(y, budget)
+            else:
+                picked = lttb_indices(timestamps[present], y, budget)
+            keep.append(present[picked])
+        rows = np.unique(np.concatenate(keep))
+
+    return {
+        "station_id": columns["station_id"],
+        "count": len(rows),
+        "timestamps": [columns["timestamps"][row] for row in rows],
+        "fields": {field: [values[row] for row in rows] for field, values in columns["fields"].items()},
+    }
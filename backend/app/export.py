@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+
+from .aggregates import AGGREGATE_TIMEZONE
+from .db import SessionLocal
+from .models import SENSOR_FIELDS, SensorReading
+
+EXPORT_BATCH_SIZE = 5000
+
+CSV_HEADERS = {
+    "station_id": "สถานี",
+    "timestamp": "วันที่และเวลา",
+    "air_temperature": "อุณหภูมิอากาศ (°C)",
+    "relative_humidity": "ความชื้นสัมพัทธ์ (%)",
+    "light_intensity": "ความเข้มแสง (lux)",
+    "wind_speed": "ความเร็วลม (m/s)",
+    "wind_direction": "ทิศทางลม (°)",
+    "rainfall": "ปริมาณน้ำฝน (mm)",
+    "atmospheric_pressure": "ความกดอากาศ (hPa)",
+    "vpd": "VPD (kPa)",
+    "soil_moisture1": "ความชื้นดิน 1 (%)",
+    "soil_moisture2": "ความชื้นดิน 2 (%)",
+}
+
+
+def export_query(
+    station_ids: Sequence[str], sensors: Sequence[str], start: Optional[datetime], end: Optional[datetime]
+):
+    columns = [SensorReading.station_id, SensorReading.timestamp] + [getattr(SensorReading, field) for field in sensors]
+    query = select(*columns).where(SensorReading.station_id.in_(station_ids))
+    if start:
+        query = query.where(SensorReading.timestamp >= start)
+    if end:
+        query = query.where(SensorReading.timestamp < end)
+    return query.order_by(SensorReading.station_id, SensorReading.timestamp)
+
+
+def stream_readings(
+    station_ids: Sequence[str],
+    sensors: Sequence[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    export_format: str,
+    tz: str = AGGREGATE_TIMEZONE,
+) -> Iterator[bytes]:
+    zone = ZoneInfo(tz)
+    fields = ["station_id", "timestamp", *sensors]
+
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow([CSV_HEADERS[field] for field in fields])
+        yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    # The request-scoped session is closed before the body is sent, so the stream owns its own.
+    with SessionLocal() as db:
+        result = db.execute(
+            export_query(station_ids, sensors, start, end),
+            execution_options={"yield_per": EXPORT_BATCH_SIZE},
+        )
+        for rows in result.partitions():
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer, lineterminator="\n")
+                for row in rows:
+                    writer.writerow(
+                        [row[0], row[1].astimezone(zone).strftime("%Y-%m-%d %H:%M:%S")]
+                        + ["" if value is None else value for value in row[2:]]
+                    )
+                yield buffer.getvalue().encode("utf-8")
+            else:
+                lines: List[str] = []
+                for row in rows:
+                    record = dict(zip(fields, row))
+                    record["timestamp"] = row[1].isoformat()
+                    lines.append(json.dumps(record, ensure_ascii=False))
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def resolve_sensors(sensors: Optional[List[str]]) -> List[str]:
+    if not sensors:
+        return list(SENSOR_FIELDS)
+    unknown = [sensor for sensor in sensors if sensor not in SENSOR_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown sensors: {', '.join(unknown)}")
+    return list(sensors)
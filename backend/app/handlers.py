@@ -0,0 +1,324 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .aggregates import AGGREGATE_TIMEZONE, aggregate_readings, resolve_timezone
+from .cache import table_cache
+from .changes import list_changes, station_change_txid
+from .columnar import COLUMNAR_MEDIA_TYPE, downsampled_reading_columns, pack_columns, reading_columns
+from .compare import MAX_COMPARE_CELLS, MAX_COMPARE_STATIONS, bucket_count, compare_stations
+from .distributions import WIND_SPEED_BINS, hourly_heatmap, wind_rose
+from .export import resolve_sensors
+from .ingest import (
+    build_reading_row,
+    find_readings,
+    find_readings_by_id,
+    ingest_batch,
+    insert_reading_rows,
+    normalize_timestamp,
+    reading_key,
+)
+from .models import PlotActivity, SensorReading, SimPayment, Station, StationImage, StationLatestReading
+from .pagination import paginate_readings
+from .reference import cached_station, cached_stations_body, station_exists
+from .rollups import aggregate_rollups
+from .schemas import SensorReadingBatchOut, SensorReadingCreate, SensorReadingPage
+from .serialization import (
+    FastJSONResponse,
+    activities_query,
+    readings_query,
+    rows_response,
+    sim_payments_query,
+    stations_query,
+)
+from .snapshot import station_dashboard
+from .station_stats import MAX_STATISTICS_CELLS, MAX_STATISTICS_STATIONS, station_statistics
+
+# Route logic shared by the sync routes in main.py and the async ones in async_api.py, which call
+# these through AsyncSession.run_sync. Validation errors surface as HTTPException either way.
+
+
+def bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=400, detail=detail)
+
+
+def resolve_fields(sensors: Optional[List[str]]) -> List[str]:
+    try:
+        return resolve_sensors(sensors)
+    except ValueError as exc:
+        raise bad_request(str(exc))
+
+
+def resolve_tz(tz: str) -> str:
+    try:
+        return resolve_timezone(tz)
+    except ValueError as exc:
+        raise bad_request(str(exc))
+
+
+def resolve_range(start: Optional[datetime], end: Optional[datetime], days: int) -> Tuple[datetime, datetime]:
+    end = normalize_timestamp(end)
+    start = normalize_timestamp(start) if start else end - timedelta(days=days)
+    if end < start:
+        raise bad_request("end must not be before start")
+    return start, end
+
+
+def check_cells(bucket: str, start: datetime, end: datetime, station_count: int, max_cells: int) -> None:
+    if bucket_count(bucket, start, end) * station_count > max_cells:
+        raise bad_request("Time range too long for this bucket size; use a larger bucket")
+
+
+def changes_response(db: Session, query, change_txid, row_id, table_name: str, since: str, *args) -> FastJSONResponse:
+    try:
+        return FastJSONResponse(list_changes(db, query, change_txid, row_id, table_name, since, *args))
+    except ValueError as exc:
+        raise bad_request(str(exc))
+
+
+def list_stations(
+    db: Session, owner_id: Optional[str], since: Optional[str], validators: Dict[str, str]
+) -> Response:
+    if since is None:
+        body = cached_stations_body(db, owner_id, validators.get("ETag"))
+        return Response(body, media_type="application/json", headers=validators)
+    if owner_id:
+        raise bad_request("owner_id cannot be combined with since")
+    return changes_response(db, stations_query(), station_change_txid(), Station.id, Station.__tablename__, since)
+
+
+def get_station_dashboard(db: Session, station_id: str) -> dict:
+    dashboard = station_dashboard(db, station_id)
+    if not dashboard:
+        raise HTTPException(status_code=404, detail="Station not found")
+    return dashboard
+
+
+def get_station(db: Session, station_id: str, etag: Optional[str] = None) -> dict:
+    station = cached_station(db, station_id, etag)
+    if not station:
+        raise HTTPException(status_code=404, detail="Station not found")
+    return station
+
+
+def get_latest_station_image(db: Session, station_id: str) -> StationImage:
+    image = db.scalar(
+        select(StationImage)
+        .where(StationImage.station_id == station_id)
+        .order_by(StationImage.timestamp.desc())
+        .limit(1)
+    )
+    if not image:
+        raise HTTPException(status_code=404, detail="Station image not found")
+    return image
+
+
+def list_readings(db: Session, station_id: str, limit: int, days: Optional[int], since: Optional[str]) -> Response:
+    if since is None:
+        return rows_response(db.execute(readings_query(station_id, limit, days)))
+    if days:
+        raise bad_request("days cannot be combined with since")
+    return changes_response(
+        db,
+        readings_query(station_id, limit),
+        SensorReading.change_txid,
+        SensorReading.id,
+        SensorReading.__tablename__,
+        since,
+        station_id,
+        limit,
+    )
+
+
+def list_readings_page(
+    db: Session,
+    station_id: str,
+    limit: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    cursor: Optional[str],
+    order: str,
+) -> SensorReadingPage:
+    try:
+        readings, next_cursor = paginate_readings(db, station_id, limit, start, end, cursor, order)
+    except ValueError as exc:
+        raise bad_request(str(exc))
+    return SensorReadingPage(items=readings, next_cursor=next_cursor)
+
+
+def list_reading_columns(
+    db: Session,
+    station_id: str,
+    sensors: Optional[List[str]],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    days: Optional[int],
+    limit: int,
+    columns_format: str,
+    max_points: Optional[int],
+    downsample: str,
+) -> Response:
+    fields = resolve_fields(sensors)
+    if days and not start:
+        start = datetime.utcnow() - timedelta(days=days)
+
+    if max_points:
+        # Downsampling covers the whole range; limit only caps raw responses.
+        columns = downsampled_reading_columns(db, station_id, fields, start, end, max_points, downsample)
+    else:
+        columns = reading_columns(db, station_id, fields, start, end, limit)
+    if columns_format == "float32":
+        return Response(pack_columns(columns), media_type=COLUMNAR_MEDIA_TYPE)
+    return FastJSONResponse(columns)
+
+
+def get_wind_rose(
+    db: Session,
+    station_id: str,
+    days: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    sectors: int,
+    speed_bins: Optional[List[float]],
+) -> Response:
+    bins = sorted(speed_bins) if speed_bins else WIND_SPEED_BINS
+    start, end = resolve_range(start, end, days)
+    return FastJSONResponse(wind_rose(db, station_id, start, end, sectors, bins))
+
+
+def get_hourly_heatmap(
+    db: Session,
+    station_id: str,
+    sensor: str,
+    statistic: str,
+    days: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    tz: str,
+) -> Response:
+    (field,) = resolve_fields([sensor])
+    tz = resolve_tz(tz)
+    start, end = resolve_range(start, end, days)
+    return FastJSONResponse(hourly_heatmap(db, station_id, field, start, end, tz, statistic))
+
+
+def aggregate_station_readings(db: Session, station_id: str, bucket: str, days: int, tz: str) -> List[dict]:
+    tz = resolve_tz(tz)
+    start_date = datetime.utcnow() - timedelta(days=days)
+    if tz == AGGREGATE_TIMEZONE:
+        return aggregate_rollups(db, station_id, bucket, start_date)
+    return aggregate_readings(db, station_id, bucket, start_date, tz)
+
+
+def create_reading(
+    db: Session, station_id: str, payload: SensorReadingCreate, response: Response, on_conflict: str
+) -> Any:
+    if not station_exists(db, station_id):
+        raise HTTPException(status_code=404, detail="Station not found")
+
+    try:
+        row = build_reading_row(station_id, payload, payload.id)
+    except ValueError as exc:
+        raise bad_request(str(exc))
+    # Same rule as the batch route: in ignore mode a known id is a duplicate wherever it is stored.
+    if on_conflict == "ignore" and payload.id:
+        existing = find_readings_by_id(db, [payload.id]).get(payload.id)
+        if existing:
+            response.status_code = status.HTTP_200_OK
+            return existing
+    outcomes = insert_reading_rows(db, [row], on_conflict)
+    db.commit()
+    table_cache.invalidate(StationLatestReading.__tablename__)
+
+    key = reading_key(row)
+    if outcomes.get(key) == "inserted":
+        return row
+    response.status_code = status.HTTP_200_OK
+    if key in outcomes:
+        return row
+    return find_readings(db, [key])[key]
+
+
+def create_readings_batch(db: Session, readings: List[Any], on_conflict: str) -> SensorReadingBatchOut:
+    result = ingest_batch(db, readings, on_conflict)
+    db.commit()
+    table_cache.invalidate(StationLatestReading.__tablename__)
+    return result
+
+
+def compare_station_readings(
+    db: Session,
+    station_id: List[str],
+    sensors: Optional[List[str]],
+    bucket: str,
+    days: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    tz: str,
+    fill: str,
+) -> Response:
+    fields = resolve_fields(sensors)
+    tz = resolve_tz(tz)
+    station_ids = list(dict.fromkeys(station_id))
+    if len(station_ids) > MAX_COMPARE_STATIONS:
+        raise bad_request(f"At most {MAX_COMPARE_STATIONS} stations can be compared")
+    start, end = resolve_range(start, end, days)
+    check_cells(bucket, start, end, len(station_ids), MAX_COMPARE_CELLS)
+
+    return FastJSONResponse(compare_stations(db, station_ids, fields, bucket, start, end, tz, fill))
+
+
+def station_reading_statistics(
+    db: Session,
+    station_id: Optional[List[str]],
+    area: Optional[str],
+    sensors: Optional[List[str]],
+    bucket: str,
+    days: int,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    tz: str,
+) -> Response:
+    fields = resolve_fields(sensors)
+    tz = resolve_tz(tz)
+    station_ids = list(dict.fromkeys(station_id or []))
+    if area:
+        area_stations = db.scalars(select(Station.id).where(Station.area == area).order_by(Station.id))
+        station_ids += [sid for sid in area_stations if sid not in station_ids]
+    if not station_ids:
+        raise bad_request("Provide station_id or an area with stations")
+    if len(station_ids) > MAX_STATISTICS_STATIONS:
+        raise bad_request(f"At most {MAX_STATISTICS_STATIONS} stations can be analysed")
+    start, end = resolve_range(start, end, days)
+    check_cells(bucket, start, end, len(station_ids), MAX_STATISTICS_CELLS)
+
+    return FastJSONResponse(station_statistics(db, station_ids, fields, bucket, start, end, tz))
+
+
+def list_activities(db: Session, station_id: Optional[str], since: Optional[str]) -> Response:
+    if since is None:
+        return rows_response(db.execute(activities_query(station_id)))
+    # station_id is editable, so an activity moved to another station would never show up as deleted.
+    if station_id:
+        raise bad_request("station_id cannot be combined with since")
+    return changes_response(
+        db, activities_query(), PlotActivity.change_txid, PlotActivity.id, PlotActivity.__tablename__, since
+    )
+
+
+def list_sim_payments(
+    db: Session, station_id: Optional[str], status_filter: Optional[str], since: Optional[str]
+) -> Response:
+    if since is None:
+        return rows_response(db.execute(sim_payments_query(station_id, status_filter)))
+    # A payment leaving the filtered status or station would never show up as deleted.
+    if status_filter:
+        raise bad_request("status cannot be combined with since")
+    if station_id:
+        raise bad_request("station_id cannot be combined with since")
+    return changes_response(
+        db, sim_payments_query(), SimPayment.change_txid, SimPayment.id, SimPayment.__tablename__, since
+    )
@@ -0,0 +1,191 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from pydantic import ValidationError
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .latest import upsert_latest_readings
+from .live import announce_readings
+from .models import SENSOR_FIELDS, SensorReading, Station
+from .rollups import apply_rollups, refresh_rollups
+from .schemas import SensorReadingBase, SensorReadingBatchItem, SensorReadingBatchOut, SensorReadingBatchResult
+
+# Readings outside this window are rejected instead of being stored in the default partition.
+READING_MAX_AGE_DAYS = int(os.getenv("READING_MAX_AGE_DAYS", "3660"))
+READING_MAX_FUTURE_HOURS = float(os.getenv("READING_MAX_FUTURE_HOURS", "24"))
+
+
+def normalize_timestamp(value: Optional[datetime]) -> datetime:
+    if value is None:
+        return datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def check_reading_timestamp(timestamp: datetime) -> None:
+    now = datetime.now(timezone.utc)
+    if not now - timedelta(days=READING_MAX_AGE_DAYS) <= timestamp <= now + timedelta(hours=READING_MAX_FUTURE_HOURS):
+        raise ValueError(
+            f"timestamp must be within the last {READING_MAX_AGE_DAYS} days "
+            f"and at most {READING_MAX_FUTURE_HOURS:g} hours ahead"
+        )
+
+
+def build_reading_row(station_id: str, payload: SensorReadingBase, reading_id: Optional[str] = None) -> Dict[str, Any]:
+    row = {
+        "id": reading_id or f"reading-{uuid4().hex[:12]}",
+        "station_id": station_id,
+        "timestamp": normalize_timestamp(payload.timestamp),
+    }
+    check_reading_timestamp(row["timestamp"])
+    for field in SENSOR_FIELDS:
+        row[field] = getattr(payload, field)
+    return row
+
+
+def reading_key(row: Dict[str, Any]) -> Tuple[str, datetime]:
+    return row["station_id"], row["timestamp"]
+
+
+def insert_reading_rows(
+    db: Session, rows: List[Dict[str, Any]], on_conflict: str = "ignore"
+) -> Dict[Tuple[str, datetime], str]:
+    if not rows:
+        return {}
+    statement = pg_insert(SensorReading)
+    existing = set()
+    if on_conflict == "update":
+        existing = set(find_readings(db, [reading_key(row) for row in rows]))
+        statement = statement.on_conflict_do_update(
+            index_elements=["station_id", "timestamp"],
+            set_={field: statement.excluded[field] for field in SENSOR_FIELDS},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=["station_id", "timestamp"])
+    statement = statement.returning(SensorReading.id, SensorReading.station_id, SensorReading.timestamp)
+
+    outcomes: Dict[Tuple[str, datetime], str] = {}
+    stored_ids: Dict[Tuple[str, datetime], str] = {}
+    # Sorted so concurrent batches take the (station_id, timestamp) key locks in the same order.
+    for reading_id, station_id, timestamp in db.execute(statement, sorted(rows, key=reading_key)):
+        key = (station_id, timestamp)
+        outcomes[key] = "updated" if key in existing else "inserted"
+        stored_ids[key] = reading_id
+
+    written = []
+    for row in rows:
+        key = reading_key(row)
+        if key in outcomes:
+            row["id"] = stored_ids[key]
+            written.append(row)
+
+    apply_rollups(db, [row for row in written if outcomes[reading_key(row)] == "inserted"])
+    refresh_rollups(db, [row for row in written if outcomes[reading_key(row)] == "updated"])
+    upsert_latest_readings(db, written)
+    announce_readings(db, written)
+    return outcomes
+
+
+def find_readings(db: Session, keys: List[Tuple[str, datetime]]) -> Dict[Tuple[str, datetime], SensorReading]:
+    if not keys:
+        return {}
+    query = select(SensorReading).where(tuple_(SensorReading.station_id, SensorReading.timestamp).in_(keys))
+    return {(reading.station_id, reading.timestamp): reading for reading in db.scalars(query)}
+
+
+def find_readings_by_id(db: Session, reading_ids: List[str]) -> Dict[str, SensorReading]:
+    """Stored readings with the given ids, whatever their timestamp.
+
+    The primary key is (id, timestamp), so a retried reading with a new or server-assigned
+    timestamp would otherwise be stored a second time under the same id.
+    """
+    if not reading_ids:
+        return {}
+    query = select(SensorReading).where(SensorReading.id.in_(reading_ids))
+    return {reading.id: reading for reading in db.scalars(query)}
+
+
+def ingest_batch(db: Session, items: List[Any], on_conflict: str = "ignore") -> SensorReadingBatchOut:
+    results: List[SensorReadingBatchResult] = []
+    parsed: List[tuple] = []
+    for index, raw in enumerate(items):
+        if not isinstance(raw, dict):
+            results.append(SensorReadingBatchResult(index=index, status="rejected", detail="Reading must be an object"))
+            continue
+        try:
+            parsed.append((index, SensorReadingBatchItem.model_validate(raw)))
+        except ValidationError as exc:
+            station_id = raw.get("station_id")
+            results.append(
+                SensorReadingBatchResult(
+                    index=index,
+                    station_id=station_id if isinstance(station_id, str) else None,
+                    status="rejected",
+                    detail=str(exc.errors(include_url=False)[0]["msg"]),
+                )
+            )
+
+    station_ids = {item.station_id for _, item in parsed}
+    known_stations = set()
+    if station_ids:
+        known_stations = set(db.scalars(select(Station.id).where(Station.id.in_(station_ids))))
+
+    # In update mode a known id is just another write to its (station_id, timestamp), as on the single route.
+    requested_ids = [item.id for _, item in parsed if item.id] if on_conflict == "ignore" else []
+    existing_ids = set(find_readings_by_id(db, requested_ids))
+
+    rows: List[Dict[str, Any]] = []
+    pending: List[Tuple[int, Dict[str, Any]]] = []
+    seen_ids = set()
+    seen_keys = set()
+    for index, item in parsed:
+        if item.station_id not in known_stations:
+            results.append(
+                SensorReadingBatchResult(
+                    index=index, id=item.id, station_id=item.station_id, status="rejected", detail="Station not found"
+                )
+            )
+            continue
+
+        try:
+            row = build_reading_row(item.station_id, item, item.id)
+        except ValueError as exc:
+            results.append(
+                SensorReadingBatchResult(
+                    index=index, id=item.id, station_id=item.station_id, status="rejected", detail=str(exc)
+                )
+            )
+            continue
+        if row["id"] in existing_ids or row["id"] in seen_ids or reading_key(row) in seen_keys:
+            results.append(
+                SensorReadingBatchResult(index=index, id=item.id, station_id=item.station_id, status="duplicate")
+            )
+            continue
+
+        seen_ids.add(row["id"])
+        seen_keys.add(reading_key(row))
+        rows.append(row)
+        pending.append((index, row))
+
+    outcomes = insert_reading_rows(db, rows, on_conflict)
+    stored = find_readings(db, [reading_key(row) for row in rows if reading_key(row) not in outcomes])
+    for index, row in pending:
+        key = reading_key(row)
+        if key in outcomes:
+            status = "accepted" if outcomes[key] == "inserted" else "updated"
+            reading_id = row["id"]
+        else:
+            status = "duplicate"
+            reading_id = stored[key].id if key in stored else None
+        results.append(SensorReadingBatchResult(index=index, id=reading_id, station_id=row["station_id"], status=status))
+
+    results.sort(key=lambda result: result.index)
+    counts = {status: 0 for status in ("accepted", "updated", "duplicate", "rejected")}
+    for result in results:
+        counts[result.status] += 1
+    return SensorReadingBatchOut(**counts, results=results)
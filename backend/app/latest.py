@@ -0,0 +1,50 @@
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .cache import CACHE_BACKEND, INVALIDATION_CHANNEL
+from .models import SENSOR_FIELDS, SensorReading, StationLatestReading
+
+LATEST_COLUMNS = ("id", "station_id", "timestamp", *SENSOR_FIELDS)
+
+
+def upsert_latest_readings(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        current = latest.get(row["station_id"])
+        if current is None or row["timestamp"] > current["timestamp"]:
+            latest[row["station_id"]] = row
+    if not latest:
+        return
+
+    # Rows are locked in VALUES order; a fixed order keeps overlapping batches from deadlocking.
+    table = StationLatestReading.__table__
+    statement = pg_insert(table).values(
+        [{column: latest[station_id][column] for column in LATEST_COLUMNS} for station_id in sorted(latest)]
+    )
+    advanced = db.execute(
+        statement.on_conflict_do_update(
+            index_elements=["station_id"],
+            set_={
+                **{column: statement.excluded[column] for column in LATEST_COLUMNS if column != "station_id"},
+                "updated_at": func.now(),
+            },
+            where=table.c.timestamp <= statement.excluded.timestamp,
+        ).returning(table.c.station_id)
+    ).first()
+    # This table has no version trigger, so other workers hear about it here. Postgres folds the
+    # repeated notifications of one transaction into one, delivered at commit.
+    if advanced is not None and CACHE_BACKEND == "postgres":
+        db.execute(select(func.pg_notify(INVALIDATION_CHANNEL, table.name)))
+
+
+def rebuild_latest_readings(db: Session) -> None:
+    source = (
+        select(*[getattr(SensorReading, column) for column in LATEST_COLUMNS])
+        .distinct(SensorReading.station_id)
+        .order_by(SensorReading.station_id, SensorReading.timestamp.desc(), SensorReading.id.desc())
+    )
+    db.execute(delete(StationLatestReading))
+    db.execute(insert(StationLatestReading).from_select(list(LATEST_COLUMNS), source))
@@ -0,0 +1,160 @@
+import asyncio
+import os
+import threading
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set
+
+import orjson
+from sqlalchemy import Text, bindparam, event, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from .pubsub import PostgresListener
+from .schemas import SensorReadingOut
+from .serialization import JSON_OPTIONS
+
+LIVE_BACKEND = os.getenv("LIVE_BACKEND", "memory").lower()
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "64"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "15"))
+LIVE_CHANNEL = "sensor_readings_live"
+READING_FIELDS = tuple(SensorReadingOut.model_fields)
+
+if LIVE_BACKEND not in ("memory", "postgres"):
+    raise ValueError(f"LIVE_BACKEND must be one of memory, postgres (got {LIVE_BACKEND!r})")
+
+
+class Subscription:
+    def __init__(self, station_ids: Optional[Set[str]], loop: asyncio.AbstractEventLoop) -> None:
+        self.station_ids = station_ids
+        self.loop = loop
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(LIVE_QUEUE_SIZE)
+
+    def offer(self, frame: bytes) -> None:
+        # A viewer that falls behind only needs the newest readings, so drop the oldest.
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(frame)
+
+
+class ReadingHub:
+    """Fan readings out to every subscribed stream in this process.
+
+    Each reading is encoded into an SSE frame once, and delivery is scheduled once per event loop,
+    so the cost of a reading grows with its matching subscribers only, never with database reads.
+    publish() is thread-safe and may be called from request threads or the LISTEN thread.
+    """
+
+    def __init__(self) -> None:
+        self.subscriptions: Dict[Optional[str], Set[Subscription]] = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def subscribe(self, station_ids: Optional[Sequence[str]]) -> Subscription:
+        subscription = Subscription(set(station_ids) if station_ids else None, asyncio.get_running_loop())
+        with self.lock:
+            for station_id in subscription.station_ids or (None,):
+                self.subscriptions[station_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self.lock:
+            for station_id in subscription.station_ids or (None,):
+                self.subscriptions[station_id].discard(subscription)
+                if not self.subscriptions[station_id]:
+                    del self.subscriptions[station_id]
+
+    def has_subscribers(self) -> bool:
+        return bool(self.subscriptions)
+
+    def publish(self, readings: Iterable[Dict[str, Any]]) -> None:
+        deliveries: Dict[asyncio.AbstractEventLoop, List[tuple]] = defaultdict(list)
+        with self.lock:
+            for reading in readings:
+                targets = self.subscriptions.get(reading["station_id"], set()) | self.subscriptions.get(None, set())
+                if not targets:
+                    continue
+                frame = encode_frame(reading)
+                for subscription in targets:
+                    deliveries[subscription.loop].append((subscription, frame))
+        for loop, batch in deliveries.items():
+            try:
+                loop.call_soon_threadsafe(deliver, batch)
+            except RuntimeError:
+                # The subscriber's loop has shut down; its stream is gone with it.
+                pass
+
+
+def deliver(batch: List[tuple]) -> None:
+    for subscription, frame in batch:
+        subscription.offer(frame)
+
+
+def reading_payload(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: row[field] for field in READING_FIELDS}
+
+
+def encode_frame(reading: Dict[str, Any]) -> bytes:
+    data = orjson.dumps(reading, option=JSON_OPTIONS)
+    return b"id: " + reading["id"].encode() + b"\nevent: reading\ndata: " + data + b"\n\n"
+
+
+hub = ReadingHub()
+_listener: Optional[PostgresListener] = None
+
+
+def announce_readings(db: Session, rows: Sequence[Dict[str, Any]]) -> None:
+    """Queue written readings for subscribers; nothing is sent unless the transaction commits.
+
+    The memory backend publishes from an after_commit hook. The postgres backend sends NOTIFY in
+    the same transaction instead, and every worker (this one included) publishes what it hears.
+    """
+    if not rows:
+        return
+    if LIVE_BACKEND == "postgres":
+        payloads = [orjson.dumps(reading_payload(row), option=JSON_OPTIONS).decode() for row in rows]
+        db.execute(select(func.pg_notify(LIVE_CHANNEL, func.unnest(bindparam("payloads", payloads, ARRAY(Text))))))
+    elif hub.has_subscribers():
+        db.info.setdefault("live_readings", []).extend(reading_payload(row) for row in rows)
+
+
+@event.listens_for(Session, "after_commit")
+def publish_committed_readings(session: Session) -> None:
+    readings = session.info.pop("live_readings", None)
+    if readings:
+        hub.publish(readings)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_rolled_back_readings(session: Session) -> None:
+    session.info.pop("live_readings", None)
+
+
+def publish_notifications(payloads: List[str]) -> None:
+    hub.publish(orjson.loads(payload) for payload in payloads)
+
+
+async def reading_stream(station_ids: Optional[Sequence[str]]) -> AsyncIterator[bytes]:
+    subscription = hub.subscribe(station_ids)
+    try:
+        # Opening comment so proxies and EventSource see the stream start straight away.
+        yield b": connected\n\n"
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.queue.get(), LIVE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+def start_live_listener(sync_engine) -> None:
+    global _listener
+    if LIVE_BACKEND == "postgres" and _listener is None:
+        _listener = PostgresListener(sync_engine, LIVE_CHANNEL, publish_notifications)
+        _listener.start()
+
+
+def stop_live_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,34 +1,76 @@
+import logging
 import os
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Union
 from uuid import uuid4
 
-from fastapi import Depends, FastAPI, HTTPException, Query, status
+from fastapi import Depends, FastAPI, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from .db import Base, SessionLocal, engine, get_db
-from .models import PlotActivity, SensorReading, SimPayment, Station, StationImage, User, WeatherForecast
+from . import handlers
+from .admin import ADMIN_HEADER, ADMIN_TOKEN, require_token
+from .aggregates import AGGREGATE_TIMEZONE
+from .async_api import router as async_router
+from .cache import start_invalidation_listener, stop_invalidation_listener, table_cache
+from .changes import install_change_tracking
+from .columnar import COLUMNAR_MAX_ROWS
+from .db import ASYNC_DATABASE, Base, SessionLocal, async_engine, engine, get_db
+from .export import stream_readings
+from .live import reading_stream, start_live_listener, stop_live_listener
+from .metrics import MetricsMiddleware, render_prometheus
+from .models import PlotActivity, SimPayment, Station, StationImage, User
+from .partitions import (
+    create_future_partitions,
+    ensure_reading_key,
+    is_partitioned,
+    start_partition_maintenance,
+    stop_partition_maintenance,
+)
+from .profiling import PROFILE_HEADER, PROFILE_TOKEN, ProfilingMiddleware, get_profile, list_profiles
+from .querylog import settings as query_log_settings
+from .reference import cached_forecast, cached_user, cached_users
 from .schemas import (
     AuthLogin,
+    ChangesOut,
+    HeatmapOut,
     PlotActivityCreate,
     PlotActivityOut,
     PlotActivityUpdate,
+    PoolStatsOut,
+    ProfileOut,
+    QueryLogSettings,
+    QueryLogSettingsUpdate,
+    ReadingAggregateOut,
+    ReadingColumnsOut,
+    SensorReadingBatch,
+    SensorReadingBatchOut,
     SensorReadingCreate,
     SensorReadingOut,
+    SensorReadingPage,
     SimPaymentCreate,
     SimPaymentOut,
     SimPaymentUpdate,
+    StationComparisonOut,
     StationCreate,
+    StationDashboardOut,
     StationImageOut,
     StationOut,
+    StationSnapshotOut,
+    StationStatisticsOut,
     StationUpdate,
     UserCreate,
     UserOut,
     UserUpdate,
     WeatherForecastOut,
+    WindRoseOut,
 )
 from .seed import seed_data
+from .snapshot import fleet_snapshot
+from .versions import FORECAST_TABLES, IMAGE_TABLES, STATION_TABLES, conditional_get, install_version_triggers
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="WiMaRC API", version="0.1.0")
 
@@ -40,13 +82,42 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if PROFILE_TOKEN:
+    app.add_middleware(ProfilingMiddleware)
+# Profiles hold stack dumps, so reading them takes the same token as recording them.
+require_profile_token = Depends(require_token(PROFILE_TOKEN, PROFILE_HEADER.decode()))
+
+# Registered ahead of the synchronous routes below so the async handlers take precedence.
+if ASYNC_DATABASE:
+    app.include_router(async_router)
 
 
 @app.on_event("startup")
 def on_startup() -> None:
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        install_version_triggers(connection)
+        install_change_tracking(connection)
+        if is_partitioned(connection):
+            create_future_partitions(connection)
+        else:
+            logger.warning("sensor_readings is not partitioned; run `python -m app.partitions migrate`")
+            ensure_reading_key(connection)
     with SessionLocal() as session:
         seed_data(session)
+    start_invalidation_listener(engine)
+    start_live_listener(engine)
+    start_partition_maintenance(engine)
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    stop_invalidation_listener()
+    stop_live_listener()
+    stop_partition_maintenance()
+    if async_engine is not None:
+        await async_engine.dispose()
 
 
 @app.get("/health")
@@ -54,6 +125,53 @@ def health_check() -> dict:
     return {"status": "ok"}
 
 
+def engine_pools() -> List[tuple]:
+    pools = [("sync", engine.pool)]
+    if async_engine is not None:
+        pools.append(("async", async_engine.sync_engine.pool))
+    return pools
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics() -> str:
+    return render_prometheus(engine_pools(), table_cache.stats())
+
+
+@app.get("/admin/pool", response_model=List[PoolStatsOut])
+def get_pool_stats() -> List[dict]:
+    return [dict(pool.stats(), name=name) for name, pool in engine_pools()]
+
+
+@app.get("/admin/profiles", response_model=List[ProfileOut], dependencies=[require_profile_token])
+def get_profiles() -> List[dict]:
+    return list_profiles()
+
+
+@app.get("/admin/profiles/{profile_id}", response_class=PlainTextResponse, dependencies=[require_profile_token])
+def get_profile_stacks(profile_id: str) -> str:
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile["stacks"]
+
+
+@app.get("/admin/query-log", response_model=QueryLogSettings)
+def get_query_log_settings() -> dict:
+    return query_log_settings
+
+
+@app.put(
+    "/admin/query-log",
+    response_model=QueryLogSettings,
+    dependencies=[Depends(require_token(ADMIN_TOKEN, ADMIN_HEADER))],
+)
+def update_query_log_settings(payload: QueryLogSettingsUpdate) -> dict:
+    for key, value in payload.model_dump(exclude_unset=True).items():
+        if value is not None:
+            query_log_settings[key] = value
+    return query_log_settings
+
+
 @app.post("/auth/login", response_model=UserOut)
 def login(payload: AuthLogin, db: Session = Depends(get_db)) -> User:
     user = (
@@ -66,22 +184,40 @@ def login(payload: AuthLogin, db: Session = Depends(get_db)) -> User:
     return user
 
 
-@app.get("/stations", response_model=List[StationOut])
+@app.get("/stations", response_model=Union[List[StationOut], ChangesOut[StationOut]])
 def list_stations(
     owner_id: Optional[str] = None,
+    since: Optional[str] = None,
+    validators: Dict[str, str] = Depends(conditional_get(*STATION_TABLES)),
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.list_stations(db, owner_id, since, validators)
+
+
+@app.get("/stations/snapshot", response_model=List[StationSnapshotOut])
+def get_fleet_snapshot(
+    station_id: Optional[List[str]] = Query(None),
+    owner_id: Optional[str] = None,
+    area: Optional[str] = None,
     db: Session = Depends(get_db),
-) -> List[Station]:
-    query = db.query(Station)
-    if owner_id:
-        query = query.filter(Station.owner_id == owner_id)
-    return query.order_by(Station.id).all()
+) -> List[dict]:
+    return fleet_snapshot(db, station_id, owner_id, area)
+
+
+@app.get("/stations/{station_id}/dashboard", response_model=StationDashboardOut)
+def get_station_dashboard(station_id: str, db: Session = Depends(get_db)) -> dict:
+    return handlers.get_station_dashboard(db, station_id)
 
 
 @app.get("/stations/{station_id}", response_model=StationOut)
-def get_station(station_id: str, db: Session = Depends(get_db)) -> Station:
-    station = db.query(Station).filter(Station.id == station_id).first()
-    if not station:
-        raise HTTPException(status_code=404, detail="Station not found")
+def get_station(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(conditional_get(*STATION_TABLES)),
+    db: Session = Depends(get_db),
+) -> dict:
+    station = handlers.get_station(db, station_id, validators.get("ETag"))
+    response.headers.update(validators)
     return station
 
 
@@ -105,6 +241,7 @@ def create_station(payload: StationCreate, db: Session = Depends(get_db)) -> Sta
     )
     db.add(station)
     db.commit()
+    table_cache.invalidate(Station.__tablename__)
     db.refresh(station)
     return station
 
@@ -119,6 +256,7 @@ def update_station(station_id: str, payload: StationUpdate, db: Session = Depend
         setattr(station, key, value)
 
     db.commit()
+    table_cache.invalidate(Station.__tablename__)
     db.refresh(station)
     return station
 
@@ -130,84 +268,198 @@ def delete_station(station_id: str, db: Session = Depends(get_db)) -> None:
         raise HTTPException(status_code=404, detail="Station not found")
     db.delete(station)
     db.commit()
+    table_cache.invalidate(Station.__tablename__)
 
 
 @app.get("/stations/{station_id}/images/latest", response_model=StationImageOut)
-def get_latest_station_image(station_id: str, db: Session = Depends(get_db)) -> StationImage:
-    image = (
-        db.query(StationImage)
-        .filter(StationImage.station_id == station_id)
-        .order_by(StationImage.timestamp.desc())
-        .first()
-    )
-    if not image:
-        raise HTTPException(status_code=404, detail="Station image not found")
+def get_latest_station_image(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(conditional_get(*IMAGE_TABLES)),
+    db: Session = Depends(get_db),
+) -> StationImage:
+    image = handlers.get_latest_station_image(db, station_id)
+    response.headers.update(validators)
     return image
 
 
 @app.get("/stations/{station_id}/forecast", response_model=List[WeatherForecastOut])
-def get_station_forecast(station_id: str, db: Session = Depends(get_db)) -> List[WeatherForecast]:
-    return (
-        db.query(WeatherForecast)
-        .filter(WeatherForecast.station_id == station_id)
-        .order_by(WeatherForecast.forecast_date.asc())
-        .all()
-    )
+def get_station_forecast(
+    station_id: str,
+    response: Response,
+    validators: Dict[str, str] = Depends(conditional_get(*FORECAST_TABLES)),
+    db: Session = Depends(get_db),
+) -> List[dict]:
+    response.headers.update(validators)
+    return cached_forecast(db, station_id, validators.get("ETag"))
 
 
-@app.get("/stations/{station_id}/readings", response_model=List[SensorReadingOut])
+@app.get(
+    "/stations/{station_id}/readings",
+    response_model=Union[List[SensorReadingOut], ChangesOut[SensorReadingOut]],
+)
 def list_readings(
     station_id: str,
     limit: int = Query(100, ge=1, le=1000),
     days: Optional[int] = Query(None, ge=1, le=365),
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.list_readings(db, station_id, limit, days, since)
+
+
+@app.get("/stations/{station_id}/readings/page", response_model=SensorReadingPage)
+def list_readings_page(
+    station_id: str,
+    limit: int = Query(500, ge=1, le=5000),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_db),
+) -> SensorReadingPage:
+    return handlers.list_readings_page(db, station_id, limit, start, end, cursor, order)
+
+
+@app.get("/stations/{station_id}/readings/columns", response_model=ReadingColumnsOut)
+def list_reading_columns(
+    station_id: str,
+    sensors: Optional[List[str]] = Query(None),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    days: Optional[int] = Query(None, ge=1, le=3660),
+    limit: int = Query(COLUMNAR_MAX_ROWS, ge=1, le=COLUMNAR_MAX_ROWS),
+    columns_format: str = Query("json", alias="format", pattern="^(json|float32)$"),
+    max_points: Optional[int] = Query(None, ge=3, le=10000),
+    downsample: str = Query("lttb", pattern="^(lttb|minmax)$"),
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.list_reading_columns(
+        db, station_id, sensors, start, end, days, limit, columns_format, max_points, downsample
+    )
+
+
+@app.get("/stations/{station_id}/readings/wind-rose", response_model=WindRoseOut)
+def get_wind_rose(
+    station_id: str,
+    days: int = Query(30, ge=1, le=3660),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sectors: int = Query(16, ge=4, le=36),
+    speed_bins: Optional[List[float]] = Query(None),
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.get_wind_rose(db, station_id, days, start, end, sectors, speed_bins)
+
+
+@app.get("/stations/{station_id}/readings/heatmap", response_model=HeatmapOut)
+def get_hourly_heatmap(
+    station_id: str,
+    sensor: str = "air_temperature",
+    statistic: str = Query("avg", pattern="^(avg|min|max)$"),
+    days: int = Query(30, ge=1, le=3660),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tz: str = Query(AGGREGATE_TIMEZONE),
     db: Session = Depends(get_db),
-) -> List[SensorReading]:
-    query = db.query(SensorReading).filter(SensorReading.station_id == station_id)
-    if days:
-        start_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(SensorReading.timestamp >= start_date)
-    return query.order_by(SensorReading.timestamp.desc()).limit(limit).all()
+) -> Response:
+    return handlers.get_hourly_heatmap(db, station_id, sensor, statistic, days, start, end, tz)
+
+
+@app.get("/stations/{station_id}/readings/aggregate", response_model=List[ReadingAggregateOut])
+def aggregate_station_readings(
+    station_id: str,
+    bucket: str = Query("day", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=3660),
+    tz: str = Query(AGGREGATE_TIMEZONE),
+    db: Session = Depends(get_db),
+) -> List[dict]:
+    return handlers.aggregate_station_readings(db, station_id, bucket, days, tz)
 
 
 @app.post("/stations/{station_id}/readings", response_model=SensorReadingOut, status_code=status.HTTP_201_CREATED)
 def create_reading(
-    station_id: str, payload: SensorReadingCreate, db: Session = Depends(get_db)
-) -> SensorReading:
-    station = db.query(Station).filter(Station.id == station_id).first()
-    if not station:
-        raise HTTPException(status_code=404, detail="Station not found")
+    station_id: str,
+    payload: SensorReadingCreate,
+    response: Response,
+    on_conflict: str = Query("ignore", pattern="^(ignore|update)$"),
+    db: Session = Depends(get_db),
+) -> Any:
+    return handlers.create_reading(db, station_id, payload, response, on_conflict)
+
 
-    reading = SensorReading(
-        id=payload.id or f"reading-{uuid4().hex[:12]}",
-        station_id=station_id,
-        timestamp=payload.timestamp or datetime.utcnow(),
-        air_temperature=payload.air_temperature,
-        relative_humidity=payload.relative_humidity,
-        light_intensity=payload.light_intensity,
-        wind_direction=payload.wind_direction,
-        wind_speed=payload.wind_speed,
-        rainfall=payload.rainfall,
-        atmospheric_pressure=payload.atmospheric_pressure,
-        vpd=payload.vpd,
-        soil_moisture1=payload.soil_moisture1,
-        soil_moisture2=payload.soil_moisture2,
+@app.post("/readings/batch", response_model=SensorReadingBatchOut)
+def create_readings_batch(
+    payload: SensorReadingBatch,
+    on_conflict: str = Query("ignore", pattern="^(ignore|update)$"),
+    db: Session = Depends(get_db),
+) -> SensorReadingBatchOut:
+    return handlers.create_readings_batch(db, payload.readings, on_conflict)
+
+
+@app.get("/readings/compare", response_model=StationComparisonOut)
+def compare_station_readings(
+    station_id: List[str] = Query(...),
+    sensors: Optional[List[str]] = Query(None),
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    days: int = Query(7, ge=1, le=3660),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tz: str = Query(AGGREGATE_TIMEZONE),
+    fill: str = Query("none", pattern="^(none|previous)$"),
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.compare_station_readings(db, station_id, sensors, bucket, days, start, end, tz, fill)
+
+
+@app.get("/readings/statistics", response_model=StationStatisticsOut)
+def station_reading_statistics(
+    station_id: Optional[List[str]] = Query(None),
+    area: Optional[str] = None,
+    sensors: Optional[List[str]] = Query(None),
+    bucket: str = Query("hour", pattern="^(hour|day)$"),
+    days: int = Query(30, ge=1, le=3660),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    tz: str = Query(AGGREGATE_TIMEZONE),
+    db: Session = Depends(get_db),
+) -> Response:
+    return handlers.station_reading_statistics(db, station_id, area, sensors, bucket, days, start, end, tz)
+
+
+@app.get("/readings/live", response_class=StreamingResponse)
+async def stream_live_readings(station_id: Optional[List[str]] = Query(None)) -> StreamingResponse:
+    return StreamingResponse(
+        reading_stream(station_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    station.last_data_time = reading.timestamp
-    db.add(reading)
-    db.commit()
-    db.refresh(reading)
-    return reading
+
+@app.get("/readings/export")
+def export_readings(
+    station_id: List[str] = Query(...),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    sensors: Optional[List[str]] = Query(None),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+) -> StreamingResponse:
+    fields = handlers.resolve_fields(sensors)
+
+    media_type = "text/csv; charset=utf-8" if export_format == "csv" else "application/x-ndjson"
+    filename = f"readings_{datetime.utcnow():%Y%m%d}.{export_format}"
+    return StreamingResponse(
+        stream_readings(station_id, fields, start, end, export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
-@app.get("/activities", response_model=List[PlotActivityOut])
+@app.get("/activities", response_model=Union[List[PlotActivityOut], ChangesOut[PlotActivityOut]])
 def list_activities(
-    station_id: Optional[str] = None, db: Session = Depends(get_db)
-) -> List[PlotActivity]:
-    query = db.query(PlotActivity)
-    if station_id:
-        query = query.filter(PlotActivity.station_id == station_id)
-    return query.order_by(PlotActivity.date.desc()).all()
+    station_id: Optional[str] = None, since: Optional[str] = None, db: Session = Depends(get_db)
+) -> Response:
+    return handlers.list_activities(db, station_id, since)
 
 
 @app.post("/activities", response_model=PlotActivityOut, status_code=status.HTTP_201_CREATED)
@@ -255,13 +507,13 @@ def delete_activity(activity_id: str, db: Session = Depends(get_db)) -> None:
 
 
 @app.get("/users", response_model=List[UserOut])
-def list_users(db: Session = Depends(get_db)) -> List[User]:
-    return db.query(User).order_by(User.username).all()
+def list_users(db: Session = Depends(get_db)) -> List[dict]:
+    return cached_users(db)
 
 
 @app.get("/users/{user_id}", response_model=UserOut)
-def get_user(user_id: str, db: Session = Depends(get_db)) -> User:
-    user = db.query(User).filter(User.id == user_id).first()
+def get_user(user_id: str, db: Session = Depends(get_db)) -> dict:
+    user = cached_user(db, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -285,6 +537,7 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db)) -> User:
     )
     db.add(user)
     db.commit()
+    table_cache.invalidate(User.__tablename__)
     db.refresh(user)
     return user
 
@@ -299,6 +552,7 @@ def update_user(user_id: str, payload: UserUpdate, db: Session = Depends(get_db)
         setattr(user, key, value)
 
     db.commit()
+    table_cache.invalidate(User.__tablename__)
     db.refresh(user)
     return user
 
@@ -310,20 +564,17 @@ def delete_user(user_id: str, db: Session = Depends(get_db)) -> None:
         raise HTTPException(status_code=404, detail="User not found")
     db.delete(user)
     db.commit()
+    table_cache.invalidate(User.__tablename__)
 
 
-@app.get("/sim-payments", response_model=List[SimPaymentOut])
+@app.get("/sim-payments", response_model=Union[List[SimPaymentOut], ChangesOut[SimPaymentOut]])
 def list_sim_payments(
     station_id: Optional[str] = None,
     status_filter: Optional[str] = Query(None, alias="status"),
+    since: Optional[str] = None,
     db: Session = Depends(get_db),
-) -> List[SimPayment]:
-    query = db.query(SimPayment)
-    if station_id:
-        query = query.filter(SimPayment.station_id == station_id)
-    if status_filter:
-        query = query.filter(SimPayment.status == status_filter)
-    return query.order_by(SimPayment.due_date.desc()).all()
+) -> Response:
+    return handlers.list_sim_payments(db, station_id, status_filter, since)
 
 
 @app.post("/sim-payments", response_model=SimPaymentOut, status_code=status.HTTP_201_CREATED)
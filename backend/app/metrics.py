@@ -0,0 +1,245 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from . import querylog
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[index] += 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            buckets = {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+            buckets["+Inf"] = self.count
+            return {"buckets": buckets, "count": self.count, "sum": self.sum, "max": self.max}
+
+
+class PoolInstrumentation:
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram()
+        self.checkout_latency = Histogram()
+        self.waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def _do_get(self):
+        with self._waiting_lock:
+            self.waiting += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_time.observe(time.perf_counter() - start)
+            with self._waiting_lock:
+                self.waiting -= 1
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_latency.observe(time.perf_counter() - start)
+
+    def stats(self) -> Dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "waiting": self.waiting,
+            "wait_time": self.wait_time.snapshot(),
+            "checkout_latency": self.checkout_latency.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(PoolInstrumentation, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(PoolInstrumentation, AsyncAdaptedQueuePool):
+    pass
+
+
+class RequestStats:
+    def __init__(self, method: str = "", path: str = "") -> None:
+        self.method = method
+        self.path = path
+        self.statements = 0
+        self.sql_time = 0.0
+        self.shapes: Dict[str, Tuple[int, float]] = {}
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def instrument_engine(sync_engine) -> None:
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def start_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("statement_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def finish_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+        elapsed = time.perf_counter() - conn.info["statement_start"].pop()
+        stats = current_request.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.sql_time += elapsed
+        if querylog.settings["enabled"]:
+            querylog.record_statement(conn, statement, parameters, executemany, elapsed, stats)
+
+
+class RouteMetrics:
+    def __init__(self) -> None:
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.response_size: Dict[Tuple[str, str], Histogram] = {}
+        self.sql_statements: Dict[Tuple[str, str], int] = {}
+        self.sql_time: Dict[Tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, duration: float, size: int, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            self.sql_statements[key] = self.sql_statements.get(key, 0) + stats.statements
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+                self.response_size[key] = Histogram(SIZE_BUCKETS)
+                self.sql_time[key] = Histogram()
+        self.latency[key].observe(duration)
+        self.response_size[key].observe(size)
+        self.sql_time[key].observe(stats.sql_time)
+
+
+route_metrics = RouteMetrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            if querylog.settings["enabled"]:
+                querylog.report_request(scope["method"], route_path, stats)
+            route_metrics.record(
+                scope["method"],
+                route_path,
+                response["status"],
+                time.perf_counter() - start,
+                response["size"],
+                stats,
+            )
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    return ",".join(f'{name}="{escape_label(str(value))}"' for name, value in labels.items())
+
+
+def render_histogram(lines: List[str], name: str, labels: Dict[str, str], histogram: Histogram) -> None:
+    snapshot = histogram.snapshot()
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{{{format_labels(dict(labels, le=bound))}}} {count}")
+    lines.append(f"{name}_sum{{{format_labels(labels)}}} {snapshot['sum']}")
+    lines.append(f"{name}_count{{{format_labels(labels)}}} {snapshot['count']}")
+
+
+def render_prometheus(
+    pools: Sequence[Tuple[str, PoolInstrumentation]] = (), cache_stats: Optional[Dict[str, int]] = None
+) -> str:
+    lines: List[str] = []
+    with route_metrics._lock:
+        requests = dict(route_metrics.requests)
+        statements = dict(route_metrics.sql_statements)
+        histograms = [
+            ("wimarc_http_request_duration_seconds", "Request latency.", dict(route_metrics.latency)),
+            ("wimarc_http_response_size_bytes", "Response body size.", dict(route_metrics.response_size)),
+            ("wimarc_http_sql_duration_seconds", "Time spent in SQL per request.", dict(route_metrics.sql_time)),
+        ]
+
+    lines.append("# HELP wimarc_http_requests_total Requests by route template and status.")
+    lines.append("# TYPE wimarc_http_requests_total counter")
+    for (method, route, status), count in sorted(requests.items()):
+        lines.append(f"wimarc_http_requests_total{{{format_labels({'method': method, 'route': route, 'status': status})}}} {count}")
+
+    lines.append("# HELP wimarc_http_sql_statements_total SQL statements executed by route template.")
+    lines.append("# TYPE wimarc_http_sql_statements_total counter")
+    for (method, route), count in sorted(statements.items()):
+        lines.append(f"wimarc_http_sql_statements_total{{{format_labels({'method': method, 'route': route})}}} {count}")
+
+    for name, description, series in histograms:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} histogram")
+        for (method, route), histogram in sorted(series.items()):
+            render_histogram(lines, name, {"method": method, "route": route}, histogram)
+
+    if pools:
+        lines.append("# HELP wimarc_db_pool_checked_out Connections currently checked out of the pool.")
+        lines.append("# TYPE wimarc_db_pool_checked_out gauge")
+        for pool_name, pool in pools:
+            lines.append(f"wimarc_db_pool_checked_out{{{format_labels({'pool': pool_name})}}} {pool.checkedout()}")
+        lines.append("# HELP wimarc_db_pool_wait_seconds Time spent waiting for a pooled connection.")
+        lines.append("# TYPE wimarc_db_pool_wait_seconds histogram")
+        for pool_name, pool in pools:
+            render_histogram(lines, "wimarc_db_pool_wait_seconds", {"pool": pool_name}, pool.wait_time)
+
+    if cache_stats is not None:
+        lines.append("# HELP wimarc_cache_lookups_total Reference data cache lookups by result.")
+        lines.append("# TYPE wimarc_cache_lookups_total counter")
+        for result in ("hits", "misses"):
+            lines.append(f"wimarc_cache_lookups_total{{{format_labels({'result': result})}}} {cache_stats[result]}")
+        lines.append("# HELP wimarc_cache_entries Entries currently held by the reference data cache.")
+        lines.append("# TYPE wimarc_cache_entries gauge")
+        lines.append(f"wimarc_cache_entries {cache_stats['entries']}")
+
+    return "\n".join(lines) + "\n"
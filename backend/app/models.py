@@ -1,9 +1,45 @@
-from sqlalchemy import Boolean, Column, Date, DateTime, Float, ForeignKey, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from .db import Base
 
+SENSOR_FIELDS = (
+    "air_temperature",
+    "relative_humidity",
+    "light_intensity",
+    "wind_direction",
+    "wind_speed",
+    "rainfall",
+    "atmospheric_pressure",
+    "vpd",
+    "soil_moisture1",
+    "soil_moisture2",
+)
+
+# Id of the transaction that last wrote the row (xid8, which only grows), for "changes since" sync.
+CURRENT_TXID = text("pg_current_xact_id()::text::bigint")
+
+
+def change_txid_column(index: bool = True) -> Column:
+    return Column("change_txid", BigInteger, server_default=CURRENT_TXID, nullable=False, index=index)
+
 
 class User(Base):
     __tablename__ = "users"
@@ -29,17 +65,33 @@ class Station(Base):
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
     status = Column(String, nullable=False)
-    last_data_time = Column(DateTime(timezone=True), nullable=True)
+    recorded_last_data_time = Column("last_data_time", DateTime(timezone=True), nullable=True)
     area = Column(String, nullable=False)
     description = Column(Text, nullable=False)
+    change_txid = change_txid_column()
+
+    latest_reading = relationship("StationLatestReading", uselist=False, lazy="joined", viewonly=True)
+
+    @property
+    def last_data_time(self):
+        recorded = self.recorded_last_data_time
+        if self.latest_reading is None:
+            return recorded
+        if recorded is None or self.latest_reading.timestamp > recorded:
+            return self.latest_reading.timestamp
+        return recorded
+
+    @last_data_time.setter
+    def last_data_time(self, value) -> None:
+        self.recorded_last_data_time = value
 
 
 class SensorReading(Base):
     __tablename__ = "sensor_readings"
 
     id = Column(String, primary_key=True)
-    station_id = Column(String, ForeignKey("stations.id"), index=True, nullable=False)
-    timestamp = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    station_id = Column(String, ForeignKey("stations.id"), nullable=False)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, nullable=False, server_default=func.now())
     air_temperature = Column(Float, nullable=True)
     relative_humidity = Column(Float, nullable=True)
     light_intensity = Column(Float, nullable=True)
@@ -50,6 +102,60 @@ class SensorReading(Base):
     vpd = Column(Float, nullable=True)
     soil_moisture1 = Column(Float, nullable=True)
     soil_moisture2 = Column(Float, nullable=True)
+    change_txid = change_txid_column(index=False)
+
+    __table_args__ = (
+        UniqueConstraint(station_id, timestamp, name="uq_sensor_readings_station_id_timestamp"),
+        Index("ix_sensor_readings_station_id_change_txid", station_id, change_txid),
+        {"postgresql_partition_by": 'RANGE ("timestamp")'},
+    )
+
+
+class StationLatestReading(Base):
+    __tablename__ = "station_latest_readings"
+
+    station_id = Column(String, ForeignKey("stations.id"), primary_key=True)
+    id = Column(String, nullable=False)
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    air_temperature = Column(Float, nullable=True)
+    relative_humidity = Column(Float, nullable=True)
+    light_intensity = Column(Float, nullable=True)
+    wind_direction = Column(Float, nullable=True)
+    wind_speed = Column(Float, nullable=True)
+    rainfall = Column(Float, nullable=True)
+    atmospheric_pressure = Column(Float, nullable=True)
+    vpd = Column(Float, nullable=True)
+    soil_moisture1 = Column(Float, nullable=True)
+    soil_moisture2 = Column(Float, nullable=True)
+    # When ingest last wrote the row; Last-Modified for station responses follows it.
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    change_txid = change_txid_column(index=False)
+
+
+def rollup_columns() -> list:
+    columns = [
+        Column("station_id", String, ForeignKey("stations.id"), primary_key=True),
+        Column("bucket", DateTime(timezone=True), primary_key=True),
+        Column("reading_count", Integer, nullable=False, default=0),
+    ]
+    for field in SENSOR_FIELDS:
+        columns.extend(
+            [
+                Column(f"{field}_count", Integer, nullable=False, default=0),
+                Column(f"{field}_sum", Float, nullable=True),
+                Column(f"{field}_min", Float, nullable=True),
+                Column(f"{field}_max", Float, nullable=True),
+            ]
+        )
+    return columns
+
+
+class SensorReadingHourly(Base):
+    __table__ = Table("sensor_readings_hourly", Base.metadata, *rollup_columns())
+
+
+class SensorReadingDaily(Base):
+    __table__ = Table("sensor_readings_daily", Base.metadata, *rollup_columns())
 
 
 class PlotActivity(Base):
@@ -64,6 +170,7 @@ class PlotActivity(Base):
     created_by_name = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     images = Column(JSONB, nullable=False, default=list)
+    change_txid = change_txid_column()
 
 
 class StationImage(Base):
@@ -88,6 +195,7 @@ class SimPayment(Base):
     status = Column(String, nullable=False)
     paid_date = Column(Date, nullable=True)
     notes = Column(Text, nullable=True)
+    change_txid = change_txid_column()
 
 
 class WeatherForecast(Base):
@@ -100,3 +208,26 @@ class WeatherForecast(Base):
     rain_probability = Column(Float, nullable=False)
     rainfall = Column(Float, nullable=False)
     description = Column(String, nullable=False)
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class DeletedRow(Base):
+    """Tombstone written by a trigger for every row deleted from a change-tracked table."""
+
+    __tablename__ = "deleted_rows"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    table_name = Column(String, nullable=False)
+    row_id = Column(String, nullable=False)
+    station_id = Column(String, nullable=True)
+    change_txid = Column(BigInteger, server_default=CURRENT_TXID, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_deleted_rows_table_name_change_txid", table_name, change_txid),)
@@ -0,0 +1,70 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from .models import SensorReading
+
+
+def encode_cursor(timestamp: datetime, reading_id: str) -> str:
+    payload = json.dumps({"t": timestamp.isoformat(), "id": reading_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def paginate_readings(
+    db: Session,
+    station_id: str,
+    limit: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    order: str = "desc",
+) -> Tuple[List[SensorReading], Optional[str]]:
+    query = select(SensorReading).where(SensorReading.station_id == station_id)
+    if start:
+        query = query.where(SensorReading.timestamp >= start)
+    if end:
+        query = query.where(SensorReading.timestamp < end)
+
+    if cursor:
+        after_timestamp, after_id = decode_cursor(cursor)
+        if order == "asc":
+            query = query.where(
+                SensorReading.timestamp >= after_timestamp,
+                or_(
+                    SensorReading.timestamp > after_timestamp,
+                    and_(SensorReading.timestamp == after_timestamp, SensorReading.id > after_id),
+                ),
+            )
+        else:
+            query = query.where(
+                SensorReading.timestamp <= after_timestamp,
+                or_(
+                    SensorReading.timestamp < after_timestamp,
+                    and_(SensorReading.timestamp == after_timestamp, SensorReading.id < after_id),
+                ),
+            )
+
+    if order == "asc":
+        query = query.order_by(SensorReading.timestamp.asc(), SensorReading.id.asc())
+    else:
+        query = query.order_by(SensorReading.timestamp.desc(), SensorReading.id.desc())
+
+    readings = list(db.scalars(query.limit(limit + 1)))
+    next_cursor = None
+    if len(readings) > limit:
+        readings = readings[:limit]
+        next_cursor = encode_cursor(readings[-1].timestamp, readings[-1].id)
+    return readings, next_cursor
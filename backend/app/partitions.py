@@ -0,0 +1,266 @@
+import argparse
+import logging
+import os
+import threading
+from datetime import date, datetime, timezone
+from typing import Iterable, List, Optional, Set
+
+from sqlalchemy import UniqueConstraint, text
+
+from .db import SessionLocal
+from .models import SensorReading
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = SensorReading.__tablename__
+DEFAULT_PARTITION = f"{PARENT_TABLE}_default"
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+PARTITION_MAINTENANCE_HOURS = float(os.getenv("PARTITION_MAINTENANCE_HOURS", "6"))
+# Serialises partition DDL across workers; any constant key works as long as every caller uses it.
+PARTITION_LOCK_KEY = 0x5EA5_0001
+
+_known_partitions: Set[str] = set()
+
+
+def month_start(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned(connection) -> bool:
+    relkind = connection.execute(
+        text("SELECT relkind::text FROM pg_class WHERE relname = :name AND relkind IN ('r', 'p')"),
+        {"name": PARENT_TABLE},
+    ).scalar()
+    return relkind == "p"
+
+
+def ensure_reading_key(connection) -> None:
+    """Give an unmigrated, unpartitioned sensor_readings the unique key ingest's ON CONFLICT relies on."""
+    constraints = SensorReading.__table__.constraints
+    name = next(constraint.name for constraint in constraints if isinstance(constraint, UniqueConstraint))
+    if connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name}).scalar():
+        return
+    duplicates = connection.execute(
+        text(
+            f'SELECT EXISTS (SELECT 1 FROM "{PARENT_TABLE}" GROUP BY station_id, "timestamp" HAVING count(*) > 1)'
+        )
+    ).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f"{PARENT_TABLE} has duplicate (station_id, timestamp) rows; "
+            "run `python -m app.partitions migrate`, which keeps one of each"
+        )
+    connection.execute(text(f'CREATE UNIQUE INDEX "{name}" ON "{PARENT_TABLE}" (station_id, "timestamp")'))
+
+
+def load_partitions(connection) -> Set[str]:
+    names = connection.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE parent.relname = :name"
+        ),
+        {"name": PARENT_TABLE},
+    ).scalars()
+    _known_partitions.clear()
+    _known_partitions.update(names)
+    return _known_partitions
+
+
+def lock_partitions(connection) -> None:
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+
+
+def create_default_partition(connection) -> None:
+    connection.execute(text(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{PARENT_TABLE}" DEFAULT'))
+
+
+def create_partition(connection, month: date) -> None:
+    """Create one monthly partition, moving any rows the default partition holds for that month into it.
+
+    Moved rows are re-inserted under the current transaction id, so a delta sync sees the
+    tombstones the move writes followed by the same rows again.
+    """
+    name = partition_name(month)
+    lower = datetime(month.year, month.month, 1, tzinfo=timezone.utc).isoformat()
+    upper = datetime.combine(add_months(month, 1), datetime.min.time(), tzinfo=timezone.utc).isoformat()
+    bounds = f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+    in_month = f"\"timestamp\" >= '{lower}' AND \"timestamp\" < '{upper}'"
+
+    default_rows = DEFAULT_PARTITION in _known_partitions and connection.execute(
+        text(f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE {in_month})')
+    ).scalar()
+    if not default_rows:
+        connection.execute(text(f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{PARENT_TABLE}" {bounds}'))
+        return
+
+    moved = [column.name for column in SensorReading.__table__.columns if column.name != "change_txid"]
+    columns = ", ".join(f'"{name}"' for name in moved)
+    connection.execute(text(f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS)'))
+    connection.execute(
+        text(
+            f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" WHERE {in_month} RETURNING *) '
+            f'INSERT INTO "{name}" ({columns}) SELECT {columns} FROM moved'
+        )
+    )
+    connection.execute(text(f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" {bounds}'))
+
+
+def ensure_partitions(connection, timestamps: Iterable[datetime]) -> None:
+    """Create missing monthly partitions. This is DDL: run it at startup or from maintenance, never
+    inside a request transaction, where it would hold an exclusive lock on sensor_readings.
+    """
+    months = {month_start(timestamp) for timestamp in timestamps}
+    missing = [month for month in months if partition_name(month) not in _known_partitions]
+    if not missing:
+        return
+    if not is_partitioned(connection):
+        return
+
+    lock_partitions(connection)
+    load_partitions(connection)
+    if DEFAULT_PARTITION not in _known_partitions:
+        create_default_partition(connection)
+        _known_partitions.add(DEFAULT_PARTITION)
+    for month in sorted(missing):
+        if partition_name(month) not in _known_partitions:
+            create_partition(connection, month)
+            _known_partitions.add(partition_name(month))
+
+
+def create_future_partitions(connection, months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    current = month_start(datetime.now(timezone.utc))
+    months = [add_months(current, offset) for offset in range(months_ahead + 1)]
+    ensure_partitions(connection, [datetime(month.year, month.month, 1) for month in months])
+
+
+class PartitionMaintainer(threading.Thread):
+    """Keep PARTITION_MONTHS_AHEAD months of partitions ahead of the clock for long-running workers.
+
+    Readings for months without a partition land in the default partition until one is created.
+    """
+
+    def __init__(self, sync_engine, interval_seconds: float) -> None:
+        super().__init__(name="partition-maintenance", daemon=True)
+        self.sync_engine = sync_engine
+        self.interval_seconds = interval_seconds
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval_seconds):
+            try:
+                with self.sync_engine.begin() as connection:
+                    create_future_partitions(connection)
+            except Exception:
+                logger.warning("Creating future partitions failed; retrying later", exc_info=True)
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+
+_maintainer: Optional[PartitionMaintainer] = None
+
+
+def start_partition_maintenance(sync_engine) -> None:
+    global _maintainer
+    if PARTITION_MAINTENANCE_HOURS > 0 and _maintainer is None:
+        _maintainer = PartitionMaintainer(sync_engine, PARTITION_MAINTENANCE_HOURS * 3600)
+        _maintainer.start()
+
+
+def stop_partition_maintenance() -> None:
+    global _maintainer
+    if _maintainer is not None:
+        _maintainer.stop()
+        _maintainer = None
+
+
+def drop_partitions_before(connection, cutoff: date) -> List[str]:
+    dropped = []
+    for name in sorted(load_partitions(connection)):
+        suffix = name[len(PARENT_TABLE) + 2 :]
+        try:
+            month = datetime.strptime(suffix, "%Y_%m").date()
+        except ValueError:
+            continue
+        if month < date(cutoff.year, cutoff.month, 1):
+            connection.execute(text(f'ALTER TABLE "{PARENT_TABLE}" DETACH PARTITION "{name}"'))
+            connection.execute(text(f'DROP TABLE "{name}"'))
+            _known_partitions.discard(name)
+            dropped.append(name)
+    return dropped
+
+
+def migrate_to_partitioned(connection) -> None:
+    if is_partitioned(connection):
+        return
+
+    legacy = f"{PARENT_TABLE}_legacy"
+    connection.execute(text(f'ALTER TABLE "{PARENT_TABLE}" RENAME TO "{legacy}"'))
+    index_names = connection.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :name"), {"name": legacy}
+    ).scalars()
+    for index_name in list(index_names):
+        connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"'))
+
+    SensorReading.__table__.create(bind=connection)
+    create_default_partition(connection)
+    bounds = connection.execute(text(f'SELECT min("timestamp"), max("timestamp") FROM "{legacy}"')).one()
+    if bounds[0] is not None:
+        month = month_start(bounds[0])
+        while month <= month_start(bounds[1]):
+            create_partition(connection, month)
+            month = add_months(month, 1)
+
+    # Tables created before change tracking have no change_txid; those rows take the column default.
+    legacy_columns = set(
+        connection.execute(
+            text("SELECT column_name FROM information_schema.columns WHERE table_name = :name"), {"name": legacy}
+        ).scalars()
+    )
+    columns = ", ".join(
+        f'"{column.name}"' for column in SensorReading.__table__.columns if column.name in legacy_columns
+    )
+    connection.execute(
+        text(f'INSERT INTO "{PARENT_TABLE}" ({columns}) SELECT {columns} FROM "{legacy}" ON CONFLICT DO NOTHING')
+    )
+    connection.execute(text(f'DROP TABLE "{legacy}"'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage monthly partitions of sensor_readings.")
+    parser.add_argument("command", choices=["create", "drop", "migrate"])
+    parser.add_argument("--ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--before", type=lambda value: datetime.strptime(value, "%Y-%m").date(), default=None)
+    args = parser.parse_args()
+
+    if args.command == "drop" and args.before is None:
+        parser.error("drop requires --before YYYY-MM")
+
+    with SessionLocal() as session:
+        connection = session.connection()
+        if args.command == "migrate":
+            migrate_to_partitioned(connection)
+            create_future_partitions(connection, args.ahead)
+        elif args.command == "create":
+            create_future_partitions(connection, args.ahead)
+        else:
+            for name in drop_partitions_before(connection, args.before):
+                print(f"Dropped {name}")
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+from uuid import uuid4
+
+from .admin import token_matches
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "20"))
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_FLAG = "__profile"
+
+# Leaf frames in these modules are threads parked on a lock or queue, not request work.
+IDLE_MODULES = ("threading.py", "queue.py")
+PATH_MARKERS = ("site-packages" + os.sep, os.sep + "app" + os.sep, os.sep + "lib" + os.sep)
+
+profiles: "OrderedDict[str, dict]" = OrderedDict()
+_profiles_lock = threading.Lock()
+_frame_names: Dict[object, str] = {}
+
+
+def frame_name(code) -> str:
+    name = _frame_names.get(code)
+    if name is None:
+        filename = code.co_filename
+        for marker in PATH_MARKERS:
+            if marker in filename:
+                filename = filename.rsplit(marker, 1)[1]
+                break
+        name = f"{code.co_name} ({filename})"
+        _frame_names[code] = name
+    return name
+
+
+class StackSampler(threading.Thread):
+    def __init__(self, interval: float) -> None:
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or frame.f_code.co_filename.endswith(IDLE_MODULES):
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return token_matches(value.decode("latin-1"), PROFILE_TOKEN)
+    query = parse_qs(scope.get("query_string", b"").decode())
+    return token_matches(query.get(PROFILE_QUERY_FLAG, [""])[0], PROFILE_TOKEN)
+
+
+def store_profile(profile_id: str, profile: dict) -> None:
+    with _profiles_lock:
+        profiles[profile_id] = profile
+        while len(profiles) > PROFILE_HISTORY:
+            profiles.popitem(last=False)
+
+
+def get_profile(profile_id: str) -> Optional[dict]:
+    with _profiles_lock:
+        return profiles.get(profile_id)
+
+
+def list_profiles() -> List[dict]:
+    with _profiles_lock:
+        return [
+            {key: value for key, value in profile.items() if key != "stacks"}
+            for profile in reversed(profiles.values())
+        ]
+
+
+class ProfilingMiddleware:
+    """Samples every thread's stack while a request carrying the profile token is in flight.
+
+    Only installed when PROFILE_TOKEN is set. Concurrent requests share the process, so
+    their stacks can appear in the profile as well; profile on a quiet instance when possible.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid4().hex[:12]
+
+        async def send_wrapper(message) -> None:
+            if message["type"] == "http.response.start":
+                message = dict(message, headers=[*message.get("headers", []), (b"x-profile-id", profile_id.encode())])
+            await send(message)
+
+        sampler = StackSampler(PROFILE_INTERVAL_MS / 1000)
+        started_at = time.time()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            # Wait for the last sample off the event loop; joining here would stall every other request.
+            await asyncio.to_thread(sampler.join)
+            store_profile(
+                profile_id,
+                {
+                    "id": profile_id,
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "started_at": started_at,
+                    "duration": time.perf_counter() - start,
+                    "samples": sampler.sample_count,
+                    "stacks": sampler.collapsed(),
+                },
+            )
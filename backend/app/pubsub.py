@@ -0,0 +1,64 @@
+import logging
+import select
+import threading
+from typing import Callable, List
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresListener(threading.Thread):
+    """LISTEN on one channel over a dedicated connection and hand each wakeup's payloads to a callback.
+
+    Notifications are only delivered once the sending transaction commits. on_reset runs on every
+    (re)connect and when the connection drops, because anything sent while disconnected is lost.
+    """
+
+    def __init__(
+        self,
+        sync_engine,
+        channel: str,
+        on_notify: Callable[[List[str]], None],
+        on_reset: Callable[[], None] = lambda: None,
+        poll_seconds: float = 5.0,
+    ) -> None:
+        super().__init__(name=f"listen-{channel}", daemon=True)
+        self.sync_engine = sync_engine
+        self.channel = channel
+        self.on_notify = on_notify
+        self.on_reset = on_reset
+        self.poll_seconds = poll_seconds
+        self.stopped = threading.Event()
+
+    def connect(self):
+        dialect = self.sync_engine.dialect
+        args, kwargs = dialect.create_connect_args(self.sync_engine.url)
+        connection = dialect.dbapi.connect(*args, **kwargs)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        return connection
+
+    def run(self) -> None:
+        while not self.stopped.is_set():
+            connection = None
+            try:
+                connection = self.connect()
+                self.on_reset()
+                while not self.stopped.is_set():
+                    if select.select([connection], [], [], self.poll_seconds) == ([], [], []):
+                        continue
+                    connection.poll()
+                    payloads = [notify.payload for notify in connection.notifies]
+                    connection.notifies.clear()
+                    if payloads:
+                        self.on_notify(payloads)
+            except Exception:
+                logger.warning("Listener on %s lost its connection; retrying", self.channel, exc_info=True)
+                self.on_reset()
+                self.stopped.wait(self.poll_seconds)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def stop(self) -> None:
+        self.stopped.set()
@@ -0,0 +1,121 @@
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+QUERY_LOG_ENABLED = os.getenv("QUERY_LOG_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() in ("1", "true", "yes")
+REPEATED_QUERY_THRESHOLD = int(os.getenv("REPEATED_QUERY_THRESHOLD", "10"))
+
+EXPLAINABLE = ("select", "insert", "update", "delete", "with")
+PLACEHOLDER = r"(?:%\(\w+\)s|%s|\$\d+)"
+EXPANDED_PARAMETERS = re.compile(rf"\((?:\s*{PLACEHOLDER}\s*,)+\s*{PLACEHOLDER}\s*\)")
+PYFORMAT = re.compile(r"%%|%\((\w+)\)s|%s")
+WHITESPACE = re.compile(r"\s+")
+
+settings: Dict[str, Any] = {
+    "enabled": QUERY_LOG_ENABLED,
+    "slow_query_ms": SLOW_QUERY_MS,
+    "explain": SLOW_QUERY_EXPLAIN,
+    "repeated_query_threshold": REPEATED_QUERY_THRESHOLD,
+}
+
+
+def statement_shape(statement: str) -> str:
+    # IN lists are rendered with one placeholder per value, so collapse them to keep one shape per query.
+    return EXPANDED_PARAMETERS.sub("(...)", WHITESPACE.sub(" ", statement.strip()))
+
+
+def generic_statement(statement: str) -> str:
+    """Turn client-side placeholders into $n, so the statement can be planned without its values."""
+    numbers: Dict[str, int] = {}
+
+    def number(match: "re.Match[str]") -> str:
+        if match.group(0) == "%%":
+            return "%"
+        key = match.group(1) or str(len(numbers))
+        numbers.setdefault(key, len(numbers) + 1)
+        return f"${numbers[key]}"
+
+    return PYFORMAT.sub(number, statement)
+
+
+def parameter_types(parameters) -> Any:
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def describe_parameters(parameters, executemany: bool) -> str:
+    # Bound values can be secrets (the login query binds the password), so only their types are logged.
+    if executemany:
+        first = parameter_types(parameters[0]) if parameters else None
+        return f"{len(parameters)} sets, first {first!r}"
+    return repr(parameter_types(parameters))
+
+
+def explain(dbapi_connection, statement: str) -> Optional[str]:
+    cursor = dbapi_connection.cursor()
+    try:
+        # A failed EXPLAIN must not abort the request's transaction.
+        cursor.execute("SAVEPOINT query_log_explain")
+        try:
+            # A generic plan keeps the bound values out of the plan text, and so out of the log.
+            cursor.execute(f"EXPLAIN (GENERIC_PLAN) {generic_statement(statement)}")
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+        except Exception:
+            cursor.execute("ROLLBACK TO SAVEPOINT query_log_explain")
+            logger.debug("EXPLAIN failed for slow statement", exc_info=True)
+            plan = None
+        cursor.execute("RELEASE SAVEPOINT query_log_explain")
+        return plan
+    finally:
+        cursor.close()
+
+
+def record_statement(conn, statement: str, parameters, executemany: bool, elapsed: float, stats) -> None:
+    if stats is not None:
+        shape = statement_shape(statement)
+        count, total = stats.shapes.get(shape, (0, 0.0))
+        stats.shapes[shape] = (count + 1, total + elapsed)
+
+    if elapsed * 1000 < settings["slow_query_ms"]:
+        return
+    plan = None
+    if settings["explain"] and not executemany and statement.lstrip().lower().startswith(EXPLAINABLE):
+        plan = explain(conn.connection.dbapi_connection, statement)
+    logger.warning(
+        "Slow query (%.1f ms) on %s: %s\nParameters: %s%s",
+        elapsed * 1000,
+        f"{stats.method} {stats.path}" if stats is not None else "background task",
+        statement,
+        describe_parameters(parameters, executemany),
+        f"\nPlan:\n{plan}" if plan else "",
+    )
+
+
+def report_request(method: str, route: str, stats) -> None:
+    if not stats.shapes:
+        return
+    repeated = [
+        (count, total, shape)
+        for shape, (count, total) in stats.shapes.items()
+        if count > settings["repeated_query_threshold"]
+    ]
+    if not repeated:
+        return
+    for count, total, shape in sorted(repeated, reverse=True):
+        logger.warning(
+            "Possible N+1 on %s %s: statement ran %d times (%.1f ms total, %d statements in request): %s",
+            method,
+            route,
+            count,
+            total * 1000,
+            stats.statements,
+            shape,
+        )
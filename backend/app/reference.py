@@ -0,0 +1,71 @@
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from .cache import table_cache
+from .models import Station, User, WeatherForecast
+from .schemas import StationOut, UserOut, WeatherForecastOut
+from .serialization import rows_response, stations_query
+from .versions import FORECAST_TABLES, STATION_TABLES, USER_TABLES
+
+# Reference rows are cached in their serialized form, never as ORM instances bound to a session.
+# Bodies served with an ETag are keyed on it: the table versions behind the tag are a separate
+# cache entry, and a body cached before they reloaded must not go out under the newer tag.
+
+
+def cached_stations_body(db: Session, owner_id: Optional[str] = None, etag: Optional[str] = None) -> bytes:
+    return table_cache.get_or_load(
+        ("stations", owner_id, etag),
+        STATION_TABLES,
+        lambda: rows_response(db.execute(stations_query(owner_id))).body,
+    )
+
+
+def cached_station(db: Session, station_id: str, etag: Optional[str] = None) -> Optional[dict]:
+    def load() -> Optional[dict]:
+        station = db.get(Station, station_id)
+        return StationOut.model_validate(station).model_dump() if station else None
+
+    return table_cache.get_or_load(("station", station_id, etag), STATION_TABLES, load)
+
+
+def cached_forecast(db: Session, station_id: str, etag: Optional[str] = None) -> List[dict]:
+    def load() -> List[dict]:
+        forecasts = (
+            db.query(WeatherForecast)
+            .filter(WeatherForecast.station_id == station_id)
+            .order_by(WeatherForecast.forecast_date.asc())
+            .all()
+        )
+        return [WeatherForecastOut.model_validate(forecast).model_dump() for forecast in forecasts]
+
+    return table_cache.get_or_load(("forecast", station_id, etag), FORECAST_TABLES, load)
+
+
+def cached_users(db: Session) -> List[dict]:
+    def load() -> List[dict]:
+        return [UserOut.model_validate(user).model_dump() for user in db.query(User).order_by(User.username).all()]
+
+    return table_cache.get_or_load(("users",), USER_TABLES, load)
+
+
+def cached_user(db: Session, user_id: str) -> Optional[dict]:
+    def load() -> Optional[dict]:
+        user = db.get(User, user_id)
+        return UserOut.model_validate(user).model_dump() if user else None
+
+    return table_cache.get_or_load(("user", user_id), USER_TABLES, load)
+
+
+def station_exists(db: Session, station_id: str) -> bool:
+    # Keyed on the stations table alone, so reading ingest does not evict it. Misses are not
+    # cached: a worker that never sees the station's insert would keep answering 404.
+    key, tables = ("station-exists", station_id), (Station.__tablename__,)
+    hit, _ = table_cache.lookup(key, tables)
+    if hit:
+        return True
+    generations = table_cache.snapshot(tables)
+    exists = db.query(Station.id).filter(Station.id == station_id).first() is not None
+    if exists:
+        table_cache.store(key, generations, True)
+    return exists
@@ -0,0 +1,186 @@
+import argparse
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from .aggregates import AGGREGATE_FIELDS, AGGREGATE_TIMEZONE
+from .db import Base, SessionLocal, engine
+from .models import SENSOR_FIELDS, SensorReading, SensorReadingDaily, SensorReadingHourly
+
+ROLLUP_MERGE_CHUNK = 500
+# First half of the two-key advisory lock taken per station while its rollups are written.
+ROLLUP_LOCK_CLASS = 0x5EA5_0002
+
+ROLLUP_TABLES = {
+    "hour": SensorReadingHourly.__table__,
+    "day": SensorReadingDaily.__table__,
+}
+
+
+def bucket_start(timestamp: datetime, bucket: str, tz: str = AGGREGATE_TIMEZONE) -> datetime:
+    local = timestamp.astimezone(ZoneInfo(tz))
+    if bucket == "hour":
+        local = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        local = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return local.astimezone(timezone.utc)
+
+
+def empty_rollup(station_id: str, bucket: datetime) -> Dict[str, Any]:
+    row: Dict[str, Any] = {"station_id": station_id, "bucket": bucket, "reading_count": 0}
+    for field in SENSOR_FIELDS:
+        row[f"{field}_count"] = 0
+        row[f"{field}_sum"] = None
+        row[f"{field}_min"] = None
+        row[f"{field}_max"] = None
+    return row
+
+
+def accumulate(rollup: Dict[str, Any], reading: Dict[str, Any]) -> None:
+    rollup["reading_count"] += 1
+    for field in SENSOR_FIELDS:
+        value = reading.get(field)
+        if value is None:
+            continue
+        rollup[f"{field}_count"] += 1
+        rollup[f"{field}_sum"] = value if rollup[f"{field}_sum"] is None else rollup[f"{field}_sum"] + value
+        rollup[f"{field}_min"] = value if rollup[f"{field}_min"] is None else min(rollup[f"{field}_min"], value)
+        rollup[f"{field}_max"] = value if rollup[f"{field}_max"] is None else max(rollup[f"{field}_max"], value)
+
+
+def merge_statement(table, rollups: List[Dict[str, Any]]):
+    statement = pg_insert(table).values(rollups)
+    current = table.c
+    incoming = statement.excluded
+    updates = {"reading_count": current.reading_count + incoming.reading_count}
+    for field in SENSOR_FIELDS:
+        updates[f"{field}_count"] = current[f"{field}_count"] + incoming[f"{field}_count"]
+        updates[f"{field}_sum"] = func.coalesce(current[f"{field}_sum"], 0) + func.coalesce(incoming[f"{field}_sum"], 0)
+        updates[f"{field}_min"] = func.least(current[f"{field}_min"], incoming[f"{field}_min"])
+        updates[f"{field}_max"] = func.greatest(current[f"{field}_max"], incoming[f"{field}_max"])
+    return statement.on_conflict_do_update(index_elements=["station_id", "bucket"], set_=updates)
+
+
+def lock_station_rollups(db: Session, station_ids: Iterable[str]) -> None:
+    """Hold each station's rollup lock until commit, taking the locks in one fixed order.
+
+    A rebuild deletes and re-inserts rollup rows, so without it a concurrent merge or rebuild of
+    the same station can insert a row the rebuild's delete never saw. Ingest already serialises
+    per station on the latest-reading row, so this costs concurrent batches nothing extra.
+    """
+    keys = sorted({zlib.crc32(station_id.encode()) & 0x7FFF_FFFF for station_id in station_ids})
+    if keys:
+        # unnest yields the keys in array order, so the locks are taken in sorted order.
+        db.execute(
+            text("SELECT pg_advisory_xact_lock(:lock_class, key) FROM unnest(CAST(:keys AS integer[])) AS key"),
+            {"lock_class": ROLLUP_LOCK_CLASS, "keys": keys},
+        )
+
+
+def apply_rollups(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    rows = list(rows)
+    if not rows:
+        return
+    lock_station_rollups(db, [row["station_id"] for row in rows])
+    for bucket, table in ROLLUP_TABLES.items():
+        rollups: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+        for row in rows:
+            key = (row["station_id"], bucket_start(row["timestamp"], bucket))
+            if key not in rollups:
+                rollups[key] = empty_rollup(*key)
+            accumulate(rollups[key], row)
+        # Sorted so concurrent batches lock overlapping rollup rows in the same order.
+        merged = [rollups[key] for key in sorted(rollups)]
+        for offset in range(0, len(merged), ROLLUP_MERGE_CHUNK):
+            db.execute(merge_statement(table, merged[offset : offset + ROLLUP_MERGE_CHUNK]))
+
+
+def rebuild_rollups(
+    db: Session,
+    station_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> None:
+    for bucket, table in ROLLUP_TABLES.items():
+        local_bucket = func.date_trunc(bucket, func.timezone(AGGREGATE_TIMEZONE, SensorReading.timestamp))
+        bucket_expr = func.timezone(AGGREGATE_TIMEZONE, local_bucket).label("bucket")
+        columns = [SensorReading.station_id, bucket_expr, func.count().label("reading_count")]
+        for field in SENSOR_FIELDS:
+            column = getattr(SensorReading, field)
+            columns.extend(
+                [
+                    func.count(column).label(f"{field}_count"),
+                    func.sum(column).label(f"{field}_sum"),
+                    func.min(column).label(f"{field}_min"),
+                    func.max(column).label(f"{field}_max"),
+                ]
+            )
+        source = select(*columns).group_by(SensorReading.station_id, bucket_expr)
+        cleanup = delete(table)
+
+        if station_id:
+            source = source.where(SensorReading.station_id == station_id)
+            cleanup = cleanup.where(table.c.station_id == station_id)
+        if since:
+            start = bucket_start(since if since.tzinfo else since.replace(tzinfo=timezone.utc), "day")
+            source = source.where(SensorReading.timestamp >= start)
+            cleanup = cleanup.where(table.c.bucket >= start)
+        if until:
+            source = source.where(SensorReading.timestamp < until)
+            cleanup = cleanup.where(table.c.bucket < until)
+
+        db.execute(cleanup)
+        db.execute(insert(table).from_select([column.name for column in columns], source))
+
+
+def refresh_rollups(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+    days = {(row["station_id"], bucket_start(row["timestamp"], "day")) for row in rows}
+    lock_station_rollups(db, [station_id for station_id, _ in days])
+    for station_id, day in sorted(days):
+        rebuild_rollups(db, station_id=station_id, since=day, until=day + timedelta(days=1))
+
+
+def aggregate_rollups(db: Session, station_id: str, bucket: str, start: datetime) -> List[Dict[str, Any]]:
+    table = ROLLUP_TABLES[bucket]
+    start = bucket_start(start if start.tzinfo else start.replace(tzinfo=timezone.utc), bucket)
+    query = (
+        select(table)
+        .where(table.c.station_id == station_id, table.c.bucket >= start)
+        .order_by(table.c.bucket)
+    )
+
+    results = []
+    for rollup in db.execute(query).mappings():
+        result = {"station_id": station_id, "bucket": rollup["bucket"], "reading_count": rollup["reading_count"]}
+        for name, (aggregate, field) in AGGREGATE_FIELDS.items():
+            count = rollup[f"{field}_count"]
+            if not count:
+                result[name] = None
+            elif aggregate == "avg":
+                result[name] = rollup[f"{field}_sum"] / count
+            else:
+                result[name] = rollup[f"{field}_{aggregate}"]
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild sensor reading rollup tables from raw readings.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--station", dest="station_id", default=None)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as session:
+        rebuild_rollups(session, station_id=args.station_id, since=args.since)
+        session.commit()
+
+
+if __name__ == "__main__":
+    main()
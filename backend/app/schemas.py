@@ -1,8 +1,53 @@
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, ConfigDict, Field
 
+ItemT = TypeVar("ItemT")
+
+
+class HistogramOut(BaseModel):
+    buckets: Dict[str, int]
+    count: int
+    sum: float
+    max: float
+
+
+class PoolStatsOut(BaseModel):
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    max_overflow: int
+    timeout: float
+    waiting: int
+    wait_time: HistogramOut
+    checkout_latency: HistogramOut
+
+
+class QueryLogSettings(BaseModel):
+    enabled: bool
+    slow_query_ms: float = Field(ge=0)
+    explain: bool
+    repeated_query_threshold: int = Field(ge=1)
+
+
+class QueryLogSettingsUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    slow_query_ms: Optional[float] = Field(None, ge=0)
+    explain: Optional[bool] = None
+    repeated_query_threshold: Optional[int] = Field(None, ge=1)
+
+
+class ProfileOut(BaseModel):
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    duration: float
+    samples: int
+
 
 class AuthLogin(BaseModel):
     username: str
@@ -77,6 +122,114 @@ class SensorReadingOut(SensorReadingBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class SensorReadingPage(BaseModel):
+    items: List[SensorReadingOut]
+    next_cursor: Optional[str] = None
+
+
+class ReadingColumnsOut(BaseModel):
+    station_id: str
+    count: int
+    timestamps: List[int]
+    fields: Dict[str, List[Optional[float]]]
+
+
+class StationComparisonOut(BaseModel):
+    bucket: str
+    timezone: str
+    stations: List[str]
+    buckets: List[datetime]
+    fields: Dict[str, List[List[Optional[float]]]]
+
+
+class StationStatisticsOut(BaseModel):
+    bucket: str
+    timezone: str
+    start: datetime
+    end: datetime
+    bucket_count: int
+    stations: List[str]
+    statistics: Dict[str, Dict[str, List[Optional[float]]]]
+    correlation: Dict[str, List[List[Optional[float]]]]
+
+
+class WindRoseOut(BaseModel):
+    station_id: str
+    total: int
+    calm: int
+    directions: List[float]
+    speed_bins: List[float]
+    counts: List[List[int]]
+    frequencies: List[List[float]]
+
+
+class HeatmapOut(BaseModel):
+    station_id: str
+    sensor: str
+    statistic: str
+    timezone: str
+    days: List[date]
+    values: List[List[Optional[float]]]
+
+
+class ChangesOut(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    deleted: List[str]
+    cursor: str
+    has_more: bool
+
+
+class SensorReadingBatchItem(SensorReadingCreate):
+    station_id: str
+
+
+class SensorReadingBatch(BaseModel):
+    readings: List[Any] = Field(default_factory=list, max_length=10000)
+
+
+class SensorReadingBatchResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    station_id: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+
+
+class SensorReadingBatchOut(BaseModel):
+    accepted: int
+    updated: int = 0
+    duplicate: int = 0
+    rejected: int
+    results: List[SensorReadingBatchResult]
+
+
+class ReadingAggregateOut(BaseModel):
+    station_id: str
+    bucket: datetime
+    reading_count: int
+    avg_temperature: Optional[float] = None
+    min_temperature: Optional[float] = None
+    max_temperature: Optional[float] = None
+    avg_humidity: Optional[float] = None
+    min_humidity: Optional[float] = None
+    max_humidity: Optional[float] = None
+    avg_light_intensity: Optional[float] = None
+    avg_wind_speed: Optional[float] = None
+    avg_pressure: Optional[float] = None
+    min_pressure: Optional[float] = None
+    max_pressure: Optional[float] = None
+    avg_soil_moisture1: Optional[float] = None
+    avg_soil_moisture2: Optional[float] = None
+    avg_vpd: Optional[float] = None
+    total_rainfall: Optional[float] = None
+
+
+class StationSnapshotOut(BaseModel):
+    station: StationOut
+    latest_reading: Optional[SensorReadingOut] = None
+    latest_image: Optional[StationImageOut] = None
+
+
 class PlotActivityBase(BaseModel):
     station_id: str
     date: date
@@ -160,6 +313,10 @@ class WeatherForecastOut(WeatherForecastBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class StationDashboardOut(StationSnapshotOut):
+    forecast: List[WeatherForecastOut]
+
+
 class UserOut(BaseModel):
     id: str
     username: str
@@ -3,7 +3,20 @@ import random
 
 from sqlalchemy.orm import Session
 
-from .models import PlotActivity, SensorReading, SimPayment, Station, StationImage, User, WeatherForecast
+from .models import (
+    PlotActivity,
+    SensorReading,
+    SensorReadingDaily,
+    SimPayment,
+    Station,
+    StationImage,
+    StationLatestReading,
+    User,
+    WeatherForecast,
+)
+from .latest import rebuild_latest_readings
+from .partitions import ensure_partitions
+from .rollups import rebuild_rollups
 
 
 def minutes_ago(minutes: int) -> datetime:
@@ -532,6 +545,11 @@ def seed_sensor_readings(session: Session) -> None:
     has_year_data = oldest_date is not None and oldest_date <= (start_of_year_date + timedelta(days=1))
 
     if has_any and has_year_data:
+        if session.query(SensorReadingDaily).first() is None:
+            rebuild_rollups(session)
+        if session.query(StationLatestReading).first() is None:
+            rebuild_latest_readings(session)
+        session.commit()
         return
 
     stations = session.query(Station).all()
@@ -612,7 +630,11 @@ def seed_sensor_readings(session: Session) -> None:
                         )
                     )
 
+    ensure_partitions(session, [reading.timestamp for reading in readings])
     session.add_all(readings)
+    session.flush()
+    rebuild_rollups(session)
+    rebuild_latest_readings(session)
     session.commit()
 
 
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.engine import Result
+
+from .models import PlotActivity, SensorReading, SimPayment, Station, StationLatestReading
+from .schemas import PlotActivityOut, SensorReadingOut, SimPaymentOut, StationOut
+
+JSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=JSON_OPTIONS)
+
+
+def schema_columns(schema: Type[BaseModel], model, overrides: Optional[Dict[str, object]] = None) -> list:
+    """Select one labelled column per schema field, so rows serialize exactly like the response model."""
+    overrides = overrides or {}
+    return [
+        (overrides[name] if name in overrides else getattr(model, name)).label(name) for name in schema.model_fields
+    ]
+
+
+def rows_response(result: Result) -> FastJSONResponse:
+    # Rows go straight from the cursor to orjson; the response model is kept for OpenAPI only.
+    keys = tuple(result.keys())
+    return FastJSONResponse([dict(zip(keys, row)) for row in result])
+
+
+def readings_query(station_id: str, limit: int, days: Optional[int] = None):
+    query = select(*schema_columns(SensorReadingOut, SensorReading)).where(SensorReading.station_id == station_id)
+    if days:
+        query = query.where(SensorReading.timestamp >= datetime.utcnow() - timedelta(days=days))
+    return query.order_by(SensorReading.timestamp.desc()).limit(limit)
+
+
+def stations_query(owner_id: Optional[str] = None):
+    # Mirrors Station.last_data_time; greatest() ignores NULLs just like the property does.
+    last_data_time = func.greatest(StationLatestReading.timestamp, Station.recorded_last_data_time)
+    query = select(*schema_columns(StationOut, Station, {"last_data_time": last_data_time})).outerjoin(
+        StationLatestReading, StationLatestReading.station_id == Station.id
+    )
+    if owner_id:
+        query = query.where(Station.owner_id == owner_id)
+    return query.order_by(Station.id)
+
+
+def activities_query(station_id: Optional[str] = None):
+    query = select(*schema_columns(PlotActivityOut, PlotActivity))
+    if station_id:
+        query = query.where(PlotActivity.station_id == station_id)
+    return query.order_by(PlotActivity.date.desc())
+
+
+def sim_payments_query(station_id: Optional[str] = None, status: Optional[str] = None):
+    query = select(*schema_columns(SimPaymentOut, SimPayment))
+    if station_id:
+        query = query.where(SimPayment.station_id == station_id)
+    if status:
+        query = query.where(SimPayment.status == status)
+    return query.order_by(SimPayment.due_date.desc())
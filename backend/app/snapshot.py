@@ -0,0 +1,51 @@
+from typing import List, Optional, Sequence
+
+from sqlalchemy import select, true
+from sqlalchemy.orm import Session, aliased
+
+from .models import Station, StationImage
+from .reference import cached_forecast
+
+DASHBOARD_FORECAST_DAYS = 4
+
+
+def fleet_snapshot(
+    db: Session,
+    station_ids: Optional[Sequence[str]] = None,
+    owner_id: Optional[str] = None,
+    area: Optional[str] = None,
+) -> List[dict]:
+    image_source = (
+        select(StationImage)
+        .where(StationImage.station_id == Station.id)
+        .order_by(StationImage.timestamp.desc())
+        .limit(1)
+        .lateral()
+    )
+    latest_image = aliased(StationImage, image_source)
+
+    query = (
+        select(Station, latest_image)
+        .select_from(Station)
+        .outerjoin(latest_image, true())
+        .order_by(Station.id)
+    )
+    if station_ids:
+        query = query.where(Station.id.in_(station_ids))
+    if owner_id:
+        query = query.where(Station.owner_id == owner_id)
+    if area:
+        query = query.where(Station.area == area)
+
+    return [
+        {"station": station, "latest_reading": station.latest_reading, "latest_image": image}
+        for station, image in db.execute(query)
+    ]
+
+
+def station_dashboard(db: Session, station_id: str) -> Optional[dict]:
+    """Everything the dashboard shows for one station: one snapshot query plus the cached forecast."""
+    snapshots = fleet_snapshot(db, [station_id])
+    if not snapshots:
+        return None
+    return {**snapshots[0], "forecast": cached_forecast(db, station_id)[:DASHBOARD_FORECAST_DAYS]}
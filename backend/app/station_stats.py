@@ -0,0 +1,116 @@
+import warnings
+from datetime import datetime
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from .compare import BUCKET_STEPS, bucket_source
+
+MAX_STATISTICS_STATIONS = 100
+MAX_STATISTICS_CELLS = 1_000_000
+PERCENTILES = (5, 25, 50, 75, 95)
+# Pairs of stations need this many shared buckets before a correlation is reported.
+MIN_CORRELATION_OVERLAP = 3
+
+
+def load_grid(
+    db: Session,
+    station_ids: Sequence[str],
+    sensors: Sequence[str],
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    tz: str,
+) -> Tuple[int, Dict[str, np.ndarray]]:
+    """Fetch one (stations x buckets) float array per sensor, with NaN for empty buckets.
+
+    Only non-empty buckets leave the database, each tagged with its offset on the local-time
+    grid; the gap-filled arrays are then built with a single vectorized scatter per sensor.
+    """
+    first_local = func.date_trunc(bucket, func.timezone(tz, start))
+    last_local = func.date_trunc(bucket, func.timezone(tz, end))
+    step_seconds = BUCKET_STEPS[bucket].total_seconds()
+    span = db.scalar(select(cast(func.extract("epoch", last_local - first_local), Float)))
+    bucket_count = int(span // step_seconds) + 1
+
+    source = bucket_source(bucket, sensors, station_ids, start, end, tz)
+    offset = cast(func.extract("epoch", func.timezone(tz, source.c.bucket) - first_local), Float) / step_seconds
+    rows = db.execute(select(source.c.station_id, offset, *[source.c[field] for field in sensors])).all()
+
+    grids = {field: np.full((len(station_ids), bucket_count), np.nan) for field in sensors}
+    if rows:
+        columns = list(zip(*rows))
+        positions = {station_id: position for position, station_id in enumerate(station_ids)}
+        station_index = np.fromiter((positions[station_id] for station_id in columns[0]), np.int64, len(rows))
+        bucket_index = np.asarray(columns[1], dtype=np.float64).round().astype(np.int64)
+        for field, values in zip(sensors, columns[2:]):
+            grids[field][station_index, bucket_index] = np.asarray(values, dtype=np.float64)
+    return bucket_count, grids
+
+
+def describe(grid: np.ndarray) -> Dict[str, np.ndarray]:
+    """Per-row descriptive statistics, ignoring NaN; rows without data report NaN (null in JSON)."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        percentiles = np.nanpercentile(grid, PERCENTILES, axis=1)
+        stats = {
+            "count": np.count_nonzero(~np.isnan(grid), axis=1),
+            "mean": np.nanmean(grid, axis=1),
+            "stddev": np.nanstd(grid, axis=1, ddof=1),
+            "min": np.nanmin(grid, axis=1),
+            "max": np.nanmax(grid, axis=1),
+        }
+    for percentile, values in zip(PERCENTILES, percentiles):
+        stats[f"p{percentile}"] = np.ascontiguousarray(values)
+    return stats
+
+
+def correlation_matrix(grid: np.ndarray) -> np.ndarray:
+    """Pearson correlation between rows over the buckets both rows have data for.
+
+    Pairwise-complete sums are computed with matrix products over the presence mask, so the
+    whole matrix costs a handful of BLAS calls instead of a loop over station pairs.
+    """
+    present = ~np.isnan(grid)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # Centering first keeps the sums small; it does not change the correlation.
+        centered = np.where(present, grid - np.nanmean(grid, axis=1, keepdims=True), 0.0)
+    mask = present.astype(np.float64)
+
+    overlap = mask @ mask.T
+    sum_x = centered @ mask.T
+    sum_xx = (centered * centered) @ mask.T
+    sum_xy = centered @ centered.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = sum_xy - sum_x * sum_x.T / overlap
+        variance_x = sum_xx - sum_x * sum_x / overlap
+        variance_y = sum_xx.T - sum_x.T * sum_x.T / overlap
+        correlation = covariance / np.sqrt(variance_x * variance_y)
+    correlation[overlap < MIN_CORRELATION_OVERLAP] = np.nan
+    return np.clip(correlation, -1.0, 1.0)
+
+
+def station_statistics(
+    db: Session,
+    station_ids: Sequence[str],
+    sensors: Sequence[str],
+    bucket: str,
+    start: datetime,
+    end: datetime,
+    tz: str,
+) -> Dict[str, Any]:
+    bucket_count, grids = load_grid(db, station_ids, sensors, bucket, start, end, tz)
+    return {
+        "bucket": bucket,
+        "timezone": tz,
+        "start": start,
+        "end": end,
+        "bucket_count": bucket_count,
+        "stations": list(station_ids),
+        "statistics": {field: describe(grid) for field, grid in grids.items()},
+        "correlation": {field: correlation_matrix(grid) for field, grid in grids.items()},
+    }
@@ -0,0 +1,188 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, List, Mapping, Sequence, Tuple
+
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .db import get_async_db, get_db
+from .cache import CACHE_BACKEND, INVALIDATION_CHANNEL, table_cache
+from .models import Station, StationImage, StationLatestReading, TableVersion, User, WeatherForecast
+
+VERSION_TRIGGER = "bump_table_version"
+VERSIONED_TABLES = (
+    Station.__tablename__,
+    StationImage.__tablename__,
+    WeatherForecast.__tablename__,
+    User.__tablename__,
+)
+# Station responses include last_data_time, which follows the latest-reading table. That table is
+# written by every ingest statement, so it gets no trigger; its version is derived from its rows.
+LATEST_READING_TABLE = StationLatestReading.__tablename__
+STATION_TABLES = (Station.__tablename__, LATEST_READING_TABLE)
+IMAGE_TABLES = (StationImage.__tablename__,)
+FORECAST_TABLES = (WeatherForecast.__tablename__,)
+USER_TABLES = (User.__tablename__,)
+
+
+def install_version_triggers(connection) -> None:
+    """Bump table_versions once per write statement on every versioned table.
+
+    Statement-level triggers keep batch ingest to one counter update per statement, and the
+    counter only becomes visible when the writing transaction commits. With the postgres cache
+    backend the trigger also notifies INVALIDATION_CHANNEL, which every worker listens on.
+    """
+    notify = f"PERFORM pg_notify('{INVALIDATION_CHANNEL}', TG_TABLE_NAME);" if CACHE_BACKEND == "postgres" else ""
+    connection.execute(
+        text(
+            f"""
+            CREATE OR REPLACE FUNCTION {VERSION_TRIGGER}() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO table_versions (table_name, version, updated_at)
+                VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+                ON CONFLICT (table_name)
+                DO UPDATE SET version = table_versions.version + 1, updated_at = clock_timestamp();
+                {notify}
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+    )
+    existing = set(
+        connection.execute(
+            text("SELECT tgrelid::regclass::text FROM pg_trigger WHERE tgname = :name"),
+            {"name": VERSION_TRIGGER},
+        ).scalars()
+    )
+    connection.execute(
+        text(
+            f'ALTER TABLE "{LATEST_READING_TABLE}" '
+            "ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now()"
+        )
+    )
+    # Earlier releases versioned the latest-reading table too.
+    if LATEST_READING_TABLE in existing:
+        connection.execute(text(f'DROP TRIGGER {VERSION_TRIGGER} ON "{LATEST_READING_TABLE}"'))
+        connection.execute(text("DELETE FROM table_versions WHERE table_name = :name"), {"name": LATEST_READING_TABLE})
+    for table in VERSIONED_TABLES:
+        if table not in existing:
+            connection.execute(
+                text(
+                    f'CREATE TRIGGER {VERSION_TRIGGER} AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+                    f"FOR EACH STATEMENT EXECUTE FUNCTION {VERSION_TRIGGER}()"
+                )
+            )
+    connection.execute(
+        text(
+            "INSERT INTO table_versions (table_name, version) SELECT name, 0 FROM unnest(CAST(:tables AS text[])) AS name "
+            "ON CONFLICT (table_name) DO NOTHING"
+        ),
+        {"tables": list(VERSIONED_TABLES)},
+    )
+
+
+def versions_query(tables: Sequence[str]):
+    return (
+        select(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .where(TableVersion.table_name.in_(tables))
+        .order_by(TableVersion.table_name)
+    )
+
+
+def latest_reading_version(db: Session) -> Tuple[str, int, datetime]:
+    """Stand-in table_versions row for the latest-reading table.
+
+    Ingest only ever moves a station's latest timestamp forward, so the sum of all of them changes
+    exactly when some station's last_data_time does. updated_at is the last time any row was
+    written, not a reading timestamp: a backfill that moves one station stays below the newest
+    reading, and readings may lie in the future.
+    """
+    total, newest = db.execute(
+        select(
+            func.coalesce(func.sum(func.extract("epoch", StationLatestReading.timestamp)), 0),
+            func.max(StationLatestReading.updated_at),
+        )
+    ).one()
+    return LATEST_READING_TABLE, int(total * 1_000_000), newest or datetime.fromtimestamp(0, timezone.utc)
+
+
+def load_versions(db: Session, tables: Sequence[str]) -> List[Tuple[str, int, datetime]]:
+    def load() -> List[Tuple[str, int, datetime]]:
+        versions = [tuple(row) for row in db.execute(versions_query(tables))]
+        if LATEST_READING_TABLE in tables:
+            versions.append(latest_reading_version(db))
+        return versions
+
+    return table_cache.get_or_load(("versions", tables), tables, load)
+
+
+def validator_headers(versions: Sequence[Tuple[str, int, datetime]]) -> Dict[str, str]:
+    """ETag and Last-Modified for a response built from the given table versions.
+
+    updated_at goes into the tag as well as the counter, so a recreated database that restarts
+    its counters cannot collide with tags clients cached before.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for table_name, version, updated_at in versions:
+        digest.update(f"{table_name}:{version}:{updated_at.timestamp()};".encode())
+    last_modified = max(updated_at for _, _, updated_at in versions)
+    return {
+        "ETag": f'"{digest.hexdigest()}"',
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        # Revalidate every time; otherwise browsers cache heuristically off Last-Modified.
+        "Cache-Control": "no-cache",
+    }
+
+
+def parse_entity_tags(value: str) -> List[str]:
+    return [tag.strip().removeprefix("W/") for tag in value.split(",") if tag.strip()]
+
+
+def is_not_modified(request_headers: Mapping[str, str], headers: Dict[str, str]) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = parse_entity_tags(if_none_match)
+        return "*" in tags or headers["ETag"] in tags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(headers["Last-Modified"]) <= since
+
+
+def check_versions(request: Request, versions: Sequence[Tuple[str, int, datetime]]) -> Dict[str, str]:
+    if not versions:
+        return {}
+    headers = validator_headers(versions)
+    if is_not_modified(request.headers, headers):
+        raise HTTPException(status_code=304, headers=headers)
+    return headers
+
+
+def conditional_get(*tables: str):
+    """Dependency that answers 304 from the (cached) table versions, before the endpoint queries anything.
+
+    Otherwise it returns the validator headers for the endpoint to attach to its response.
+    """
+
+    def dependency(request: Request, db: Session = Depends(get_db)) -> Dict[str, str]:
+        return check_versions(request, load_versions(db, tables))
+
+    return dependency
+
+
+def async_conditional_get(*tables: str):
+    async def dependency(request: Request, db: AsyncSession = Depends(get_async_db)) -> Dict[str, str]:
+        return check_versions(request, await db.run_sync(load_versions, tables))
+
+    return dependency
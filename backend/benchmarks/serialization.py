@@ -0,0 +1,93 @@
+"""Compare the ORM + pydantic response path with the column-tuple + orjson fast path.
+
+Run from the backend directory against a seeded database:
+
+    python -m benchmarks.serialization --station station-001 --limit 1000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.db import SessionLocal
+from app.models import PlotActivity, SensorReading, SimPayment, Station
+from app.schemas import PlotActivityOut, SensorReadingOut, SimPaymentOut, StationOut
+from app.serialization import activities_query, readings_query, rows_response, sim_payments_query, stations_query
+
+
+def legacy_body(db, schema, load: Callable) -> bytes:
+    # Same steps FastAPI runs for an endpoint that returns ORM objects with a response_model.
+    # Drop identity-mapped objects so every run hydrates rows from scratch, as a fresh request would.
+    db.expunge_all()
+    field = create_response_field(name="response", type_=List[schema], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=load(db)))
+    return JSONResponse(content).body
+
+
+def fast_body(db, query) -> bytes:
+    return rows_response(db.execute(query)).body
+
+
+def measure(run: Callable[[], bytes], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--station", default="station-001")
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    def load_readings(db):
+        query = db.query(SensorReading).filter(SensorReading.station_id == args.station)
+        if args.days:
+            query = query.filter(SensorReading.timestamp >= datetime.utcnow() - timedelta(days=args.days))
+        return query.order_by(SensorReading.timestamp.desc()).limit(args.limit).all()
+
+    cases = [
+        ("readings", SensorReadingOut, load_readings, readings_query(args.station, args.limit, args.days)),
+        ("stations", StationOut, lambda db: db.query(Station).order_by(Station.id).all(), stations_query()),
+        (
+            "activities",
+            PlotActivityOut,
+            lambda db: db.query(PlotActivity).order_by(PlotActivity.date.desc()).all(),
+            activities_query(),
+        ),
+        (
+            "sim-payments",
+            SimPaymentOut,
+            lambda db: db.query(SimPayment).order_by(SimPayment.due_date.desc()).all(),
+            sim_payments_query(),
+        ),
+    ]
+
+    print(f"{'endpoint':<14}{'rows':>7}{'legacy ms':>12}{'fast ms':>10}{'speedup':>10}")
+    with SessionLocal() as db:
+        for name, schema, load, query in cases:
+            legacy = legacy_body(db, schema, load)
+            fast = fast_body(db, query)
+            if json.loads(legacy) != json.loads(fast):
+                raise SystemExit(f"{name}: fast path output differs from the response model output")
+
+            legacy_ms = statistics.median(measure(lambda: legacy_body(db, schema, load), args.repeat))
+            fast_ms = statistics.median(measure(lambda: fast_body(db, query), args.repeat))
+            print(f"{name:<14}{len(json.loads(fast)):>7}{legacy_ms:>12.2f}{fast_ms:>10.2f}{legacy_ms / fast_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
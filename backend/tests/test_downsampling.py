@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.downsampling import downsample_columns, lttb_indices, minmax_indices
+
+
+def make_columns(count, sensors, gaps=()):
+    rng = np.random.default_rng(7)
+    fields = {}
+    for sensor in range(sensors):
+        values = rng.normal(size=count).cumsum().tolist()
+        for start, end in gaps:
+            values[start:end] = [None] * (end - start)
+        fields[f"sensor{sensor}"] = values
+    return {
+        "station_id": "station-001",
+        "count": count,
+        "timestamps": [1_700_000_000_000 + 60_000 * row for row in range(count)],
+        "fields": fields,
+    }
+
+
+def test_lttb_keeps_endpoints_and_exact_count():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.sin(x / 30)
+    picked = lttb_indices(x, y, 50)
+    assert len(picked) == 50
+    assert picked[0] == 0 and picked[-1] == 999
+    assert np.all(np.diff(picked) > 0)
+
+
+def test_lttb_returns_everything_when_not_reducing():
+    x = np.arange(10, dtype=np.float64)
+    assert lttb_indices(x, x, 10).tolist() == list(range(10))
+    assert lttb_indices(x, x, 50).tolist() == list(range(10))
+
+
+def test_minmax_keeps_bucket_extremes():
+    y = np.array([0, 5, -3, 1, 2, 9, -1, 4], dtype=np.float64)
+    picked = minmax_indices(y, 4)
+    assert len(picked) <= 4
+    assert {2, 5} <= set(picked.tolist())
+
+
+def test_minmax_returns_everything_when_not_reducing():
+    y = np.arange(6, dtype=np.float64)
+    assert minmax_indices(y, 6).tolist() == list(range(6))
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_columns_bounds_rows(method):
+    columns = make_columns(20_000, 10)
+    result = downsample_columns(columns, 500, method)
+    assert 0 < result["count"] <= 500
+    assert len(result["timestamps"]) == result["count"]
+    assert all(len(values) == result["count"] for values in result["fields"].values())
+    if method == "lttb":
+        assert result["timestamps"][0] == columns["timestamps"][0]
+        assert result["timestamps"][-1] == columns["timestamps"][-1]
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_columns_skips_gaps(method):
+    columns = make_columns(5_000, 3, gaps=[(1_000, 3_000)])
+    columns["fields"]["empty"] = [None] * 5_000
+    result = downsample_columns(columns, 300, method)
+    assert result["count"] <= 300
+    kept = dict(zip(columns["timestamps"], range(columns["count"])))
+    for field, values in result["fields"].items():
+        for timestamp, value in zip(result["timestamps"], values):
+            original = columns["fields"][field][kept[timestamp]]
+            assert value == original or (value is None and original is None)
+    assert all(value is None for value in result["fields"]["empty"])
+    assert not any(isinstance(value, float) and math.isnan(value) for value in result["fields"]["sensor0"])
+
+
+def test_downsample_columns_falls_back_when_budget_is_too_small():
+    columns = make_columns(1_000, 10)
+    result = downsample_columns(columns, 5, "lttb")
+    assert result["count"] == 5
+    assert result["timestamps"][0] == columns["timestamps"][0]
+    assert result["timestamps"][-1] == columns["timestamps"][-1]
+
+
+def test_downsample_columns_returns_small_input_unchanged():
+    columns = make_columns(100, 2)
+    assert downsample_columns(columns, 100) is columns
+    assert downsample_columns(columns, 500, "minmax") is columns
@@ -16,11 +16,12 @@ type QueryParams = Record<string, QueryValue>
 interface ApiRequestOptions extends Omit<RequestInit, "body"> {
   body?: unknown
   query?: QueryParams
+  responseType?: "json" | "arrayBuffer"
 }
 
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000"
 
-function buildUrl(path: string, query?: QueryParams) {
+export function buildUrl(path: string, query?: QueryParams) {
   const normalizedPath = path.startsWith("/") ? path : `/${path}`
   const url = new URL(normalizedPath, API_BASE_URL)
 
@@ -35,7 +36,7 @@ function buildUrl(path: string, query?: QueryParams) {
 }
 
 export async function apiRequest<T>(path: string, options: ApiRequestOptions = {}): Promise<T> {
-  const { query, body, headers, ...rest } = options
+  const { query, body, headers, responseType = "json", ...rest } = options
   const url = buildUrl(path, query)
   const isFormData = typeof FormData !== "undefined" && body instanceof FormData
   const requestHeaders = new Headers(headers || {})
@@ -82,5 +83,9 @@ export async function apiRequest<T>(path: string, options: ApiRequestOptions = {
     return undefined as T
   }
 
+  if (responseType === "arrayBuffer") {
+    return (await response.arrayBuffer()) as T
+  }
+
   return (await response.json()) as T
 }
@@ -1,9 +1,13 @@
 import type {
+  DailyAggregate,
   PlotActivity,
   SensorReading,
   SimPayment,
+  StationComparison,
+  StationDashboard,
   Station,
   StationImage,
+  StationSnapshot,
   User,
   WeatherForecast,
 } from "@/types"
@@ -44,6 +48,45 @@ interface SensorReadingApi {
   soil_moisture2?: number | null
 }
 
+interface ReadingAggregateApi {
+  station_id: string
+  bucket: string
+  reading_count: number
+  avg_temperature?: number | null
+  min_temperature?: number | null
+  max_temperature?: number | null
+  avg_humidity?: number | null
+  min_humidity?: number | null
+  max_humidity?: number | null
+  avg_light_intensity?: number | null
+  avg_wind_speed?: number | null
+  avg_pressure?: number | null
+  min_pressure?: number | null
+  max_pressure?: number | null
+  avg_soil_moisture1?: number | null
+  avg_soil_moisture2?: number | null
+  avg_vpd?: number | null
+  total_rainfall?: number | null
+}
+
+interface StationSnapshotApi {
+  station: StationApi
+  latest_reading: SensorReadingApi | null
+  latest_image: StationImageApi | null
+}
+
+interface StationDashboardApi extends StationSnapshotApi {
+  forecast: WeatherForecastApi[]
+}
+
+interface StationComparisonApi {
+  bucket: "hour" | "day"
+  timezone: string
+  stations: string[]
+  buckets: string[]
+  fields: Record<string, (number | null)[][]>
+}
+
 interface WeatherForecastApi {
   id: string
   station_id: string
@@ -144,6 +187,103 @@ export function mapSensorReading(api: SensorReadingApi): SensorReading {
   }
 }
 
+const SENSOR_READING_KEYS: Record<string, keyof SensorReading> = {
+  air_temperature: "airTemperature",
+  relative_humidity: "relativeHumidity",
+  light_intensity: "lightIntensity",
+  wind_direction: "windDirection",
+  wind_speed: "windSpeed",
+  rainfall: "rainfall",
+  atmospheric_pressure: "atmosphericPressure",
+  vpd: "vpd",
+  soil_moisture1: "soilMoisture1",
+  soil_moisture2: "soilMoisture2",
+}
+
+/**
+ * Decode the float32 columnar readings payload: a uint32 header length, a JSON header,
+ * padding to 8 bytes, float64 epoch-ms timestamps, then one float32 column per field (NaN = missing)
+ */
+export function decodeReadingColumns(buffer: ArrayBuffer): SensorReading[] {
+  const headerLength = new DataView(buffer).getUint32(0, true)
+  const header: { station_id: string; count: number; fields: string[] } = JSON.parse(
+    new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)),
+  )
+  const { count } = header
+  let offset = Math.ceil((4 + headerLength) / 8) * 8
+
+  const timestamps = new Float64Array(buffer, offset, count)
+  offset += count * 8
+  const columns = header.fields.map((field) => {
+    const values = new Float32Array(buffer, offset, count)
+    offset += count * 4
+    return [SENSOR_READING_KEYS[field], values] as const
+  })
+
+  const readings: SensorReading[] = new Array(count)
+  for (let i = 0; i < count; i++) {
+    const reading: SensorReading = { stationId: header.station_id, timestamp: new Date(timestamps[i]) }
+    for (const [key, values] of columns) {
+      // float32 carries ~7 significant digits; trim the widening noise (83.9 -> 83.90000152...)
+      if (!Number.isNaN(values[i])) (reading as any)[key] = Number(values[i].toPrecision(7))
+    }
+    readings[i] = reading
+  }
+  return readings
+}
+
+export function mapStationSnapshot(api: StationSnapshotApi): StationSnapshot {
+  return {
+    station: mapStation(api.station),
+    latestReading: api.latest_reading ? mapSensorReading(api.latest_reading) : null,
+    latestImage: api.latest_image ? mapStationImage(api.latest_image) : null,
+  }
+}
+
+export function mapStationDashboard(api: StationDashboardApi): StationDashboard {
+  return {
+    ...mapStationSnapshot(api),
+    forecast: api.forecast.map(mapWeatherForecast),
+  }
+}
+
+export function mapStationComparison(api: StationComparisonApi): StationComparison {
+  return {
+    bucket: api.bucket,
+    stations: api.stations,
+    buckets: api.buckets.map((bucket) => new Date(bucket)),
+    fields: api.fields,
+  }
+}
+
+function roundTo(value: number | null | undefined, digits: number) {
+  if (value === null || value === undefined) return undefined
+  const factor = 10 ** digits
+  return Math.round(value * factor) / factor
+}
+
+export function mapDailyAggregate(api: ReadingAggregateApi): DailyAggregate {
+  return {
+    date: new Date(api.bucket),
+    stationId: api.station_id,
+    avgTemperature: roundTo(api.avg_temperature, 1),
+    avgHumidity: roundTo(api.avg_humidity, 1),
+    avgLightIntensity: roundTo(api.avg_light_intensity, 0),
+    avgWindSpeed: roundTo(api.avg_wind_speed, 1),
+    avgPressure: roundTo(api.avg_pressure, 1),
+    avgSoilMoisture1: roundTo(api.avg_soil_moisture1, 1),
+    avgSoilMoisture2: roundTo(api.avg_soil_moisture2, 1),
+    avgVpd: roundTo(api.avg_vpd, 2),
+    minTemperature: api.min_temperature ?? undefined,
+    maxTemperature: api.max_temperature ?? undefined,
+    minHumidity: api.min_humidity ?? undefined,
+    maxHumidity: api.max_humidity ?? undefined,
+    minPressure: api.min_pressure ?? undefined,
+    maxPressure: api.max_pressure ?? undefined,
+    totalRainfall: roundTo(api.total_rainfall, 1),
+  }
+}
+
 export function mapWeatherForecast(api: WeatherForecastApi): WeatherForecast {
   return {
     stationId: api.station_id,
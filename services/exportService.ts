@@ -5,6 +5,20 @@
 
 import type { SensorReading, DailyAggregate, PlotActivity, TimeRange } from "@/types"
 import { formatThaiDateTime, formatThaiDate } from "@/utils/dateUtils"
+import { buildUrl } from "@/services/apiClient"
+
+const SENSOR_API_FIELDS: Record<string, string> = {
+  airTemperature: "air_temperature",
+  relativeHumidity: "relative_humidity",
+  lightIntensity: "light_intensity",
+  windSpeed: "wind_speed",
+  windDirection: "wind_direction",
+  rainfall: "rainfall",
+  atmosphericPressure: "atmospheric_pressure",
+  vpd: "vpd",
+  soilMoisture1: "soil_moisture1",
+  soilMoisture2: "soil_moisture2",
+}
 
 /**
  * Convert array of objects to CSV string
@@ -120,6 +134,31 @@ export function exportSensorDataToCSV(
   downloadCSV(fullFilename, csv)
 }
 
+/**
+ * Download time-series sensor data as CSV streamed directly from the API
+ * Several stations go into one file, sorted by station then time
+ */
+export function downloadSensorDataExport(
+  stationIds: string | string[],
+  selectedSensors: string[],
+  timeRange: TimeRange,
+) {
+  const start = new Date(Date.now() - timeRange * 24 * 60 * 60 * 1000).toISOString()
+  const url = new URL(buildUrl("/readings/export", { start, format: "csv" }))
+  const ids = Array.isArray(stationIds) ? stationIds : [stationIds]
+  ids.forEach((stationId) => url.searchParams.append("station_id", stationId))
+  selectedSensors.forEach((sensor) => {
+    if (SENSOR_API_FIELDS[sensor]) url.searchParams.append("sensors", SENSOR_API_FIELDS[sensor])
+  })
+
+  const link = document.createElement("a")
+  link.setAttribute("href", url.toString())
+  link.style.visibility = "hidden"
+  document.body.appendChild(link)
+  link.click()
+  document.body.removeChild(link)
+}
+
 /**
  * Export daily aggregates to CSV
  */
@@ -3,20 +3,28 @@
  * Handles sensor reading operations and calculations
  */
 
-import type { SensorReading, TimeRange, DailyAggregate, WeatherForecast } from "@/types"
-import { apiRequest } from "@/services/apiClient"
-import { mapSensorReading, mapWeatherForecast } from "@/services/apiMappers"
+import type { SensorReading, StationComparison, TimeRange, DailyAggregate, WeatherForecast } from "@/types"
+import { apiRequest, buildUrl } from "@/services/apiClient"
+import {
+  decodeReadingColumns,
+  mapDailyAggregate,
+  mapSensorReading,
+  mapStationComparison,
+  mapWeatherForecast,
+} from "@/services/apiMappers"
+
+const CHART_MAX_POINTS = 500
 
 /**
- * Get sensor readings for a station within a time range
+ * Get sensor readings for a station within a time range, using the compact columnar format.
+ * The server downsamples the range to at most CHART_MAX_POINTS rows (LTTB), so peaks survive on any range.
  */
 export async function getSensorReadings(stationId: string, timeRange: TimeRange): Promise<SensorReading[]> {
-  const readings = await apiRequest<any[]>(`/stations/${stationId}/readings`, {
-    query: { days: timeRange, limit: 1000 },
+  const buffer = await apiRequest<ArrayBuffer>(`/stations/${stationId}/readings/columns`, {
+    query: { days: timeRange, max_points: CHART_MAX_POINTS, format: "float32" },
+    responseType: "arrayBuffer",
   })
-  return readings
-    .map(mapSensorReading)
-    .sort((a, b) => a.timestamp.getTime() - b.timestamp.getTime())
+  return decodeReadingColumns(buffer)
 }
 
 /**
@@ -32,94 +40,44 @@ export async function getLatestSensorReading(stationId: string): Promise<SensorR
 }
 
 /**
- * Calculate daily aggregates from sensor readings
+ * Receive readings for the given stations as they are ingested (Server-Sent Events).
+ * Returns a function that closes the stream; EventSource reconnects on its own after errors.
  */
-export async function getDailyAggregates(stationId: string, timeRange: TimeRange): Promise<DailyAggregate[]> {
-  const readings = await getSensorReadings(stationId, timeRange)
-
-  // Group readings by date
-  const dailyGroups = new Map<string, SensorReading[]>()
-
-  readings.forEach((reading) => {
-    const date = new Date(reading.timestamp)
-    date.setHours(0, 0, 0, 0)
-    const dateKey = date.toISOString()
-
-    if (!dailyGroups.has(dateKey)) {
-      dailyGroups.set(dateKey, [])
-    }
-    dailyGroups.get(dateKey)!.push(reading)
+export function subscribeToReadings(stationIds: string[], onReading: (reading: SensorReading) => void): () => void {
+  const url = new URL(buildUrl("/readings/live"))
+  stationIds.forEach((stationId) => url.searchParams.append("station_id", stationId))
+  const source = new EventSource(url.toString())
+  source.addEventListener("reading", (event) => {
+    onReading(mapSensorReading(JSON.parse((event as MessageEvent<string>).data)))
   })
+  return () => source.close()
+}
 
-  // Calculate aggregates for each day
-  const aggregates: DailyAggregate[] = []
-
-  dailyGroups.forEach((dayReadings, dateKey) => {
-    const date = new Date(dateKey)
-
-    // Calculate averages
-    const temps = dayReadings.map((r) => r.airTemperature).filter((v) => v !== undefined) as number[]
-    const humidity = dayReadings.map((r) => r.relativeHumidity).filter((v) => v !== undefined) as number[]
-    const light = dayReadings.map((r) => r.lightIntensity).filter((v) => v !== undefined) as number[]
-    const wind = dayReadings.map((r) => r.windSpeed).filter((v) => v !== undefined) as number[]
-    const pressure = dayReadings.map((r) => r.atmosphericPressure).filter((v) => v !== undefined) as number[]
-    const soil1 = dayReadings.map((r) => r.soilMoisture1).filter((v) => v !== undefined) as number[]
-    const soil2 = dayReadings.map((r) => r.soilMoisture2).filter((v) => v !== undefined) as number[]
-    const vpdValues = dayReadings.map((r) => r.vpd).filter((v) => v !== undefined) as number[]
-    const rainfall = dayReadings.map((r) => r.rainfall).filter((v) => v !== undefined) as number[]
-
-    const aggregate: DailyAggregate = {
-      date,
-      stationId,
-    }
-
-    if (temps.length > 0) {
-      aggregate.avgTemperature = Math.round((temps.reduce((a, b) => a + b, 0) / temps.length) * 10) / 10
-      aggregate.minTemperature = Math.min(...temps)
-      aggregate.maxTemperature = Math.max(...temps)
-    }
-
-    if (humidity.length > 0) {
-      aggregate.avgHumidity = Math.round((humidity.reduce((a, b) => a + b, 0) / humidity.length) * 10) / 10
-      aggregate.minHumidity = Math.min(...humidity)
-      aggregate.maxHumidity = Math.max(...humidity)
-    }
-
-    if (light.length > 0) {
-      aggregate.avgLightIntensity = Math.round(light.reduce((a, b) => a + b, 0) / light.length)
-    }
-
-    if (wind.length > 0) {
-      aggregate.avgWindSpeed = Math.round((wind.reduce((a, b) => a + b, 0) / wind.length) * 10) / 10
-    }
-
-    if (pressure.length > 0) {
-      aggregate.avgPressure = Math.round((pressure.reduce((a, b) => a + b, 0) / pressure.length) * 10) / 10
-      aggregate.minPressure = Math.min(...pressure)
-      aggregate.maxPressure = Math.max(...pressure)
-    }
-
-    if (soil1.length > 0) {
-      aggregate.avgSoilMoisture1 = Math.round((soil1.reduce((a, b) => a + b, 0) / soil1.length) * 10) / 10
-    }
-
-    if (soil2.length > 0) {
-      aggregate.avgSoilMoisture2 = Math.round((soil2.reduce((a, b) => a + b, 0) / soil2.length) * 10) / 10
-    }
-
-    if (vpdValues.length > 0) {
-      aggregate.avgVpd = Math.round((vpdValues.reduce((a, b) => a + b, 0) / vpdValues.length) * 100) / 100
-    }
-
-    if (rainfall.length > 0) {
-      aggregate.totalRainfall = Math.round(rainfall.reduce((a, b) => a + b, 0) * 10) / 10
-    }
-
-    aggregates.push(aggregate)
+/**
+ * Get daily aggregates for a station, bucketed on the server
+ */
+export async function getDailyAggregates(stationId: string, timeRange: TimeRange): Promise<DailyAggregate[]> {
+  const aggregates = await apiRequest<any[]>(`/stations/${stationId}/readings/aggregate`, {
+    query: { bucket: "day", days: timeRange },
   })
+  return aggregates.map(mapDailyAggregate)
+}
 
-  // Sort by date
-  return aggregates.sort((a, b) => a.date.getTime() - b.date.getTime())
+/**
+ * Compare several stations on one time axis in a single request.
+ * Sensors use API field names (e.g. "air_temperature"); empty buckets come back as null.
+ */
+export async function getStationComparison(
+  stationIds: string[],
+  timeRange: TimeRange,
+  sensors: string[],
+  bucket: "hour" | "day" = "hour",
+): Promise<StationComparison> {
+  const url = new URL(buildUrl("/readings/compare", { days: timeRange, bucket }))
+  stationIds.forEach((stationId) => url.searchParams.append("station_id", stationId))
+  sensors.forEach((sensor) => url.searchParams.append("sensors", sensor))
+  const comparison = await apiRequest<any>(url.pathname + url.search)
+  return mapStationComparison(comparison)
 }
 
 /**
@@ -3,9 +3,9 @@
  * Handles all station-related data operations
  */
 
-import type { Station, StationImage } from "@/types"
+import type { Station, StationDashboard, StationImage, StationSnapshot } from "@/types"
 import { apiRequest, ApiError } from "@/services/apiClient"
-import { mapStation, mapStationImage } from "@/services/apiMappers"
+import { mapStation, mapStationDashboard, mapStationImage, mapStationSnapshot } from "@/services/apiMappers"
 
 /**
  * Get all stations
@@ -15,6 +15,29 @@ export async function getAllStations(): Promise<Station[]> {
   return stations.map(mapStation)
 }
 
+/**
+ * Get every station with its latest reading and image in one request
+ */
+export async function getFleetSnapshot(): Promise<StationSnapshot[]> {
+  const snapshots = await apiRequest<any[]>("/stations/snapshot")
+  return snapshots.map(mapStationSnapshot)
+}
+
+/**
+ * Get a station with its latest reading, latest image and forecast in one request
+ */
+export async function getStationDashboard(stationId: string): Promise<StationDashboard | null> {
+  try {
+    const dashboard = await apiRequest<any>(`/stations/${stationId}/dashboard`)
+    return mapStationDashboard(dashboard)
+  } catch (error) {
+    if (error instanceof ApiError && error.status === 404) {
+      return null
+    }
+    throw error
+  }
+}
+
 /**
  * Get station by ID
  */
@@ -64,6 +64,26 @@ export interface StationImage {
   timestamp: Date
 }
 
+// Latest state of a station, as returned by the fleet snapshot endpoint
+export interface StationSnapshot {
+  station: Station
+  latestReading: SensorReading | null
+  latestImage: StationImage | null
+}
+
+// Everything the dashboard shows for one station, fetched in a single request
+export interface StationDashboard extends StationSnapshot {
+  forecast: WeatherForecast[]
+}
+
+// Several stations bucketed onto one shared time axis; fields[sensor][stationIndex][bucketIndex]
+export interface StationComparison {
+  bucket: "hour" | "day"
+  stations: string[]
+  buckets: Date[]
+  fields: Record<string, (number | null)[][]>
+}
+
 // Weather forecast data from external API
 export interface WeatherForecast {
   stationId: string